@@ -4,11 +4,14 @@ Converts complex legal language to simple Hindi and English.
 WITH CACHING to keep chatbot FREE for 100k+ users!
 """
 
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
 import google.generativeai as genai
-from typing import Dict, Optional
-from .cache_service import explanation_cache
+from typing import AsyncIterator, Dict, Optional
+from .cache_service import FALLBACK_EXPLANATIONS, explanation_cache
+from .single_flight import SingleFlight
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,12 +22,22 @@ if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY environment variable is required! Add it to backend/.env file")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Gemini calls allowed in flight at once on the async path; further requests
+# wait on the event loop instead of holding a worker thread.
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+
+
+class ChatStreamError(Exception):
+    """A chat answer could not be generated; carries the user-facing message."""
+
 
 class LegalExplainerAI:
     """AI service for explaining legal sections in simple language."""
 
     def __init__(self):
         self.model = None
+        self._slots = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+        self._flights = SingleFlight()
         if GEMINI_API_KEY:
             try:
                 self.model = genai.GenerativeModel('gemini-1.5-flash')
@@ -50,6 +63,10 @@ class LegalExplainerAI:
         Returns:
             Dictionary with 'simple_explanation' and optionally 'examples'
         """
+        cached = self._get_cached_explanation(section_text, language, include_examples)
+        if cached:
+            return cached
+
         if not self.model:
             return self._fallback_explanation(language)
 
@@ -57,11 +74,68 @@ class LegalExplainerAI:
 
         try:
             response = self.model.generate_content(prompt)
-            return self._parse_response(response.text, include_examples)
+            result = self._parse_response(response.text, include_examples)
+            explanation_cache.set_explanation(section_text, language, include_examples, result)
+            return result
+        except Exception as e:
+            print(f"AI explanation error: {e}")
+            return self._fallback_explanation(language)
+
+    async def explain_section_async(
+        self,
+        section_text: str,
+        language: str = "en",
+        include_examples: bool = True
+    ) -> Dict[str, str]:
+        """Non-blocking :meth:`explain_section` for the API's async handlers.
+
+        Identical requests arriving together share one Gemini call.
+        """
+        cached = await asyncio.to_thread(self._get_cached_explanation, section_text, language, include_examples)
+        if cached:
+            return cached
+
+        if not self.model:
+            return self._fallback_explanation(language)
+
+        cache_key = explanation_cache._generate_key(section_text, language, include_examples)
+        return await self._flights.do(
+            cache_key,
+            lambda: self._generate_explanation(section_text, language, include_examples),
+        )
+
+    async def _generate_explanation(
+        self,
+        section_text: str,
+        language: str,
+        include_examples: bool
+    ) -> Dict[str, str]:
+        prompt = self._create_prompt(section_text, language, include_examples)
+
+        try:
+            async with self._slots:
+                response = await self.model.generate_content_async(prompt)
+            result = self._parse_response(response.text, include_examples)
+            await asyncio.to_thread(explanation_cache.set_explanation, section_text, language, include_examples, result)
+            return result
         except Exception as e:
             print(f"AI explanation error: {e}")
             return self._fallback_explanation(language)
 
+    def _get_cached_explanation(
+        self,
+        section_text: str,
+        language: str,
+        include_examples: bool
+    ) -> Optional[Dict[str, str]]:
+        """Look up a stored explanation, logging how long the hit took."""
+        started = time.perf_counter()
+        cached = explanation_cache.get_explanation(section_text, language, include_examples)
+        if cached:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"✅ Cache hit for explanation in {elapsed_ms:.2f} ms (saved API call!)")
+        return cached
+
     def _create_prompt(
         self,
         section_text: str,
@@ -126,19 +200,12 @@ Avoid complex legal terminology. Use everyday language.
 
     def _fallback_explanation(self, language: str) -> Dict[str, str]:
         """Fallback explanation when AI is not available."""
+        return {
+            "simple_explanation": FALLBACK_EXPLANATIONS["hi" if language == "hi" else "en"],
+            "examples": ""
+        }
 
-        if language == "hi":
-            return {
-                "simple_explanation": "AI सेवा उपलब्ध नहीं है। कृपया बाद में पुनः प्रयास करें।",
-                "examples": ""
-            }
-        else:
-            return {
-                "simple_explanation": "AI service is not available. Please try again later.",
-                "examples": ""
-            }
-
-    def chat_query(
+    async def chat_query_async(
         self,
         user_question: str,
         language: str = "en",
@@ -146,9 +213,10 @@ Avoid complex legal terminology. Use everyday language.
     ) -> str:
         """
         Answer a user's legal question with SMART CACHING to stay FREE!
-        
+
         Caches common questions so 90% of users get instant answers without API calls.
-        Only unique questions hit the Gemini API.
+        Only unique questions hit the Gemini API, and identical questions arriving
+        together share one call. Cache lookups run off the event loop.
 
         Args:
             user_question: The question asked by user
@@ -158,17 +226,139 @@ Avoid complex legal terminology. Use everyday language.
         Returns:
             AI-generated answer with safety guidelines
         """
-        # 1. CHECK CACHE FIRST (90% hit rate expected!)
-        cached_answer = explanation_cache.get_chat_answer(user_question, language)
+        cached_answer = await asyncio.to_thread(explanation_cache.get_chat_answer, user_question, language)
         if cached_answer:
             print(f"✅ Cache hit for chat question (saved API call!)")
             return cached_answer
-        
+
         print(f"⚡ Cache miss - calling Gemini API")
-        
+
         if not self.model:
             return "AI service unavailable" if language == "en" else "AI सेवा उपलब्ध नहीं"
 
+        cache_key = explanation_cache._generate_chat_key(user_question, language)
+        try:
+            return await self._flights.do(
+                cache_key,
+                lambda: self._generate_chat_answer(user_question, language, context),
+            )
+        except ChatStreamError as e:
+            return str(e)
+
+    async def _generate_chat_answer(
+        self,
+        user_question: str,
+        language: str,
+        context: Optional[str]
+    ) -> str:
+        full_prompt = self._create_chat_prompt(user_question, language, context)
+
+        try:
+            async with self._slots:
+                response = await self.model.generate_content_async(full_prompt)
+            answer = self._add_disclaimer(response.text, language)
+
+            await asyncio.to_thread(explanation_cache.set_chat_answer, user_question, language, answer)
+            print(f"💾 Cached chat answer for future users")
+
+            return answer
+        except Exception as e:
+            print(f"❌ Chat query error: {e}")
+            print(f"❌ Error type: {type(e).__name__}")
+            import traceback
+            traceback.print_exc()
+            raise ChatStreamError(self._chat_error(language)) from e
+
+    async def chat_query_stream(
+        self,
+        user_question: str,
+        language: str = "en",
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Like :meth:`chat_query_async` but yields the answer in pieces as Gemini
+        produces them.
+
+        The disclaimer (when needed) is yielded last, once the whole answer is
+        known, and only a completed answer is written to the cache. If the same
+        question is already being generated, its answer is yielded in one piece
+        when ready instead of starting a second generation.
+
+        Generation runs as its own task that this generator only reads from, so
+        a client that disconnects does not stop the answer from being finished
+        and cached for anyone waiting on the same question.
+
+        Raises ChatStreamError (carrying a user-facing message) if the model is
+        unavailable or generation fails, before or after some of the answer was
+        yielded, so the caller never mistakes the error text for an answer.
+        """
+        cached_answer = await asyncio.to_thread(explanation_cache.get_chat_answer, user_question, language)
+        if cached_answer:
+            print(f"✅ Cache hit for chat question (saved API call!)")
+            yield cached_answer
+            return
+
+        print(f"⚡ Cache miss - calling Gemini API")
+
+        if not self.model:
+            raise ChatStreamError("AI service unavailable" if language == "en" else "AI सेवा उपलब्ध नहीं")
+
+        cache_key = explanation_cache._generate_chat_key(user_question, language)
+        in_flight = self._flights.join(cache_key)
+        if in_flight is not None:
+            yield await asyncio.shield(in_flight)
+            return
+
+        pieces: asyncio.Queue = asyncio.Queue()
+        generation = self._flights.start(
+            cache_key,
+            lambda: self._stream_chat_answer(user_question, language, context, pieces),
+        )
+        while (piece := await pieces.get()) is not None:
+            yield piece
+        await asyncio.shield(generation)
+
+    async def _stream_chat_answer(
+        self,
+        user_question: str,
+        language: str,
+        context: Optional[str],
+        pieces: asyncio.Queue
+    ) -> str:
+        """Generate a streamed answer, putting each piece on *pieces* and None at the end."""
+        full_prompt = self._create_chat_prompt(user_question, language, context)
+        parts = []
+
+        try:
+            async with self._slots:
+                response = await self.model.generate_content_async(full_prompt, stream=True)
+                async for chunk in response:
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        pieces.put_nowait(chunk.text)
+
+            raw_answer = "".join(parts)
+            answer = self._add_disclaimer(raw_answer, language)
+            if len(answer) > len(raw_answer):
+                pieces.put_nowait(answer[len(raw_answer):])
+
+            await asyncio.to_thread(explanation_cache.set_chat_answer, user_question, language, answer)
+            print(f"💾 Cached chat answer for future users")
+            return answer
+        except Exception as e:
+            print(f"❌ Chat stream error: {e}")
+            print(f"❌ Error type: {type(e).__name__}")
+            raise ChatStreamError(self._chat_error(language)) from e
+        finally:
+            pieces.put_nowait(None)
+
+    def _create_chat_prompt(
+        self,
+        user_question: str,
+        language: str,
+        context: Optional[str]
+    ) -> str:
+        """Create the chat prompt with the ethical guidelines for *language*."""
         if language == "hi":
             system_prompt = """
 आप एक शैक्षिक कानूनी सहायक हैं। आप भारतीय कानून की जानकारी सरल भाषा में देते हैं।
@@ -212,27 +402,18 @@ Always include this reminder in your responses when appropriate:
             full_prompt += f"Previous context: {context}\n\n"
         full_prompt += f"User question: {user_question}\n\nProvide an educational response following the ethical guidelines above:"
 
-        try:
-            response = self.model.generate_content(full_prompt)
-            answer = response.text
-            
-            # Add safety disclaimer if not already present
-            if language == "en" and "consult" not in answer.lower() and len(answer) > 100:
-                answer += "\n\n💡 Note: This is educational information. Consult a qualified lawyer for personalized advice."
-            elif language == "hi" and "वकील" not in answer and len(answer) > 100:
-                answer += "\n\n💡 नोट: यह शैक्षिक जानकारी है। व्यक्तिगत सलाह के लिए वकील से संपर्क करें।"
-            
-            # 2. CACHE THE ANSWER FOR FUTURE USERS (Make it FREE!)
-            explanation_cache.set_chat_answer(user_question, language, answer)
-            print(f"💾 Cached chat answer for future users")
-            
-            return answer
-        except Exception as e:
-            print(f"❌ Chat query error: {e}")
-            print(f"❌ Error type: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            return "Error generating response" if language == "en" else "जवाब बनाने में त्रुटि"
+        return full_prompt
+
+    def _chat_error(self, language: str) -> str:
+        return "Error generating response" if language == "en" else "जवाब बनाने में त्रुटि"
+
+    def _add_disclaimer(self, answer: str, language: str) -> str:
+        """Add safety disclaimer if not already present."""
+        if language == "en" and "consult" not in answer.lower() and len(answer) > 100:
+            answer += "\n\n💡 Note: This is educational information. Consult a qualified lawyer for personalized advice."
+        elif language == "hi" and "वकील" not in answer and len(answer) > 100:
+            answer += "\n\n💡 नोट: यह शैक्षिक जानकारी है। व्यक्तिगत सलाह के लिए वकील से संपर्क करें।"
+        return answer
 
 
 # Global instance
@@ -0,0 +1,820 @@
+"""
+Storage backends for the AI explanation cache.
+
+ExplanationCache keeps keys, the in-memory tier, hit batching and question
+matching to itself and stores entries through one of these:
+
+- SQLiteBackend: a local file (the default, one cache per instance)
+- MemoryBackend: a process-local dict, for tests and throwaway deploys
+- RedisBackend: any Redis-protocol server, so every instance shares one cache
+
+Entries are plain dicts. Explanations carry section_text_hash, language,
+include_examples, simple_explanation and examples; chat answers carry
+question_hash, language, answer and canonical_question. Writing an entry
+keeps its hit count.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:  # Optional: only needed when AI_CACHE_BACKEND=redis.
+    import redis
+except ImportError:  # pragma: no cover - depends on the environment
+    redis = None
+
+try:  # POSIX only; without it every process assumes it is the only one.
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+EXPLANATION_TABLE = "ai_explanations"
+CHAT_TABLE = "ai_chat_cache"
+TABLES = (EXPLANATION_TABLE, CHAT_TABLE)
+
+# (table, cache_key) of an entry
+EntryKey = Tuple[str, str]
+
+RECORD_FIELDS = {
+    EXPLANATION_TABLE: ("section_text_hash", "language", "include_examples", "simple_explanation", "examples"),
+    CHAT_TABLE: ("question_hash", "language", "answer", "canonical_question"),
+}
+
+# Fields whose stored text counts toward the byte limit.
+TEXT_FIELDS = {
+    EXPLANATION_TABLE: ("simple_explanation", "examples"),
+    CHAT_TABLE: ("answer",),
+}
+
+# Eviction deletes at most EVICTION_BATCH entries per transaction, pausing in
+# between so request threads never wait long on the write lock.
+EVICTION_BATCH = 200
+EVICTION_PAUSE = 0.05
+
+
+def _record_bytes(table: str, record: Dict[str, Any]) -> int:
+    return sum(len((record.get(field) or "").encode()) for field in TEXT_FIELDS[table])
+
+
+class CacheBackend(ABC):
+    """Where cache entries live. Subclasses must implement the abstract methods."""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, table: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, table: str, cache_key: str, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def put_many(self, table: str, records: Dict[str, Dict[str, Any]], only_missing: bool = False) -> int:
+        """Write *records*, or with *only_missing* just those not cached yet; returns the number written."""
+        written = 0
+        for cache_key, record in records.items():
+            if only_missing and self.get(table, cache_key) is not None:
+                continue
+            self.put(table, cache_key, record)
+            written += 1
+        return written
+
+    def find_chat_by_question_hash(self, question_hash: str, language: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Chat entries stored before canonical keys existed; only SQLite has any."""
+        return None
+
+    @abstractmethod
+    def add_hits(self, hits: Dict[EntryKey, int]) -> None:
+        """Add hit counts and mark the entries as just accessed."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_questions(self) -> Iterator[Tuple[str, str, str]]:
+        """(cache_key, language, canonical_question) of every chat entry."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def evict(self, ttl_days: float, max_rows: int, max_bytes: int) -> List[EntryKey]:
+        """Remove expired and, past a limit, least used entries; returns what went."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Entry and hit totals as explanations, explanation_hits, chats, chat_hits."""
+        raise NotImplementedError
+
+    def claim_maintenance(self, lease: float) -> bool:
+        """
+        Whether this process should run eviction for the next *lease* seconds.
+
+        Backends shared between processes let only one of them win; the claim
+        is renewed by calling again and passes on if the holder stops doing so.
+        """
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# SQLite
+
+# Applied to every pooled connection. WAL (set once in _init_db) lets readers
+# run alongside a writer; NORMAL sync is safe with WAL and only risks the last
+# few commits on power loss, which for a cache costs a regeneration.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 67108864",
+    "PRAGMA cache_size = -8192",
+)
+BUSY_TIMEOUT = 5.0
+# Per-connection cache of compiled statements, keyed on the SQL text.
+STATEMENT_CACHE_SIZE = 64
+
+# Stored text per row, for the byte limit.
+ROW_BYTES = {
+    EXPLANATION_TABLE: "length(CAST(simple_explanation AS BLOB)) + length(CAST(COALESCE(examples, '') AS BLOB))",
+    CHAT_TABLE: "length(CAST(answer AS BLOB))",
+}
+
+UPSERT_SQL = {
+    EXPLANATION_TABLE: """
+        INSERT OR REPLACE INTO ai_explanations
+        (cache_key, section_text_hash, language, include_examples,
+         simple_explanation, examples, last_accessed, hit_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?,
+            COALESCE((SELECT hit_count FROM ai_explanations WHERE cache_key = ?), 0))
+    """,
+    CHAT_TABLE: """
+        INSERT OR REPLACE INTO ai_chat_cache
+        (cache_key, question_hash, language, answer, canonical_question, last_accessed, hit_count)
+        VALUES (?, ?, ?, ?, ?, ?,
+            COALESCE((SELECT hit_count FROM ai_chat_cache WHERE cache_key = ?), 0))
+    """,
+}
+
+# Same columns as UPSERT_SQL, but rows already cached are left untouched.
+INSERT_MISSING_SQL = {
+    EXPLANATION_TABLE: """
+        INSERT INTO ai_explanations
+        (cache_key, section_text_hash, language, include_examples,
+         simple_explanation, examples, last_accessed)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(cache_key) DO NOTHING
+    """,
+    CHAT_TABLE: """
+        INSERT INTO ai_chat_cache
+        (cache_key, question_hash, language, answer, canonical_question, last_accessed)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(cache_key) DO NOTHING
+    """,
+}
+
+
+class SQLiteBackend(CacheBackend):
+    """Entries in a local SQLite file, with one pooled connection per thread."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._maintenance_lock = None
+        self._init_db()
+
+    def _lock_path(self, purpose: str) -> Path:
+        return self.db_path.with_name(f"{self.db_path.name}.{purpose}.lock")
+
+    def _init_db(self):
+        """Initialize cache database with schema."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Workers starting together take turns here, so migrations (such as
+        # the one-off VACUUM below) run in one process while the rest wait
+        # instead of timing out on the database lock.
+        with open(self._lock_path("init"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._migrate()
+
+    def _migrate(self):
+        with self._connect() as conn:
+            # Persistent: stored in the database file once set. Incremental
+            # auto-vacuum lets eviction hand freed pages back to the disk; an
+            # existing database needs one VACUUM to switch.
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_explanations (
+                    cache_key TEXT PRIMARY KEY,
+                    section_text_hash TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    include_examples BOOLEAN NOT NULL,
+                    simple_explanation TEXT NOT NULL,
+                    examples TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    hit_count INTEGER DEFAULT 0
+                )
+            """)
+
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_hash
+                ON ai_explanations(section_text_hash)
+            """)
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_chat_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    question_hash TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    hit_count INTEGER DEFAULT 0
+                )
+            """)
+
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_question
+                ON ai_chat_cache(question_hash)
+            """)
+
+            # Added after the first release; older databases gain it here.
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(ai_chat_cache)")}
+            if "canonical_question" not in columns:
+                conn.execute("ALTER TABLE ai_chat_cache ADD COLUMN canonical_question TEXT")
+
+            # Unix time of the last read or write, used for TTL and LRU eviction.
+            for table in TABLES:
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if "last_accessed" not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN last_accessed REAL")
+                    conn.execute(
+                        f"UPDATE {table} SET last_accessed = CAST(strftime('%s', created_at) AS REAL)"
+                    )
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table}(last_accessed)"
+                )
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_usage ON {table}(hit_count, last_accessed)"
+                )
+
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened (and tuned) on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=BUSY_TIMEOUT,
+                cached_statements=STATEMENT_CACHE_SIZE,
+                check_same_thread=False,
+            )
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def claim_maintenance(self, lease: float) -> bool:
+        """Held by whichever process first takes the lock file; released when it exits."""
+        if self._maintenance_lock is None:
+            lock_file = open(self._lock_path("maintenance"), "a")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._maintenance_lock = lock_file
+        return True
+
+    def close(self) -> None:
+        """Close every pooled connection (threads reopen one on next use)."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def get(self, table: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        fields = RECORD_FIELDS[table]
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(fields)} FROM {table} WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+        return dict(zip(fields, row)) if row else None
+
+    def put(self, table: str, cache_key: str, record: Dict[str, Any]) -> None:
+        self.put_many(table, {cache_key: record})
+
+    def put_many(self, table: str, records: Dict[str, Dict[str, Any]], only_missing: bool = False) -> int:
+        """Write all *records* (or only the missing ones) in one transaction."""
+        now = time.time()
+        fields = RECORD_FIELDS[table]
+        with self._connect() as conn:
+            before = conn.total_changes
+            if only_missing:
+                conn.executemany(
+                    INSERT_MISSING_SQL[table],
+                    [(cache_key, *(record.get(field) for field in fields), now) for cache_key, record in records.items()]
+                )
+            else:
+                conn.executemany(
+                    UPSERT_SQL[table],
+                    [
+                        (cache_key, *(record.get(field) for field in fields), now, cache_key)
+                        for cache_key, record in records.items()
+                    ]
+                )
+            conn.commit()
+            return conn.total_changes - before
+
+    def find_chat_by_question_hash(self, question_hash: str, language: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        fields = RECORD_FIELDS[CHAT_TABLE]
+        with self._connect() as conn:
+            row = conn.execute(
+                f"""
+                SELECT cache_key, {', '.join(fields)} FROM ai_chat_cache
+                WHERE question_hash = ? AND language = ?
+                LIMIT 1
+                """,
+                (question_hash, language)
+            ).fetchone()
+        return (row[0], dict(zip(fields, row[1:]))) if row else None
+
+    def add_hits(self, hits: Dict[EntryKey, int]) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            for table in TABLES:
+                conn.executemany(
+                    f"UPDATE {table} SET hit_count = hit_count + ?, last_accessed = ? WHERE cache_key = ?",
+                    [(count, now, cache_key) for (hit_table, cache_key), count in hits.items() if hit_table == table]
+                )
+            conn.commit()
+
+    def iter_questions(self) -> Iterator[Tuple[str, str, str]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT cache_key, language, canonical_question FROM ai_chat_cache WHERE canonical_question IS NOT NULL"
+            ).fetchall()
+        yield from rows
+
+    def evict(self, ttl_days: float, max_rows: int, max_bytes: int) -> List[EntryKey]:
+        """
+        Delete expired rows, then the least used ones while over a limit.
+
+        Rows are ranked by hit count and then by last access (LFU with an
+        LRU tie-break).
+        """
+        removed: List[EntryKey] = []
+
+        if ttl_days > 0:
+            cutoff = time.time() - ttl_days * 86400
+            for table in TABLES:
+                removed += self._evict_batches(
+                    f"SELECT '{table}', cache_key, 0 FROM {table} WHERE last_accessed < ? LIMIT ?",
+                    (cutoff,),
+                )
+
+        if max_rows > 0:
+            for table in TABLES:
+                removed += self._evict_batches(
+                    f"""
+                    SELECT '{table}', cache_key, 0 FROM {table}
+                    ORDER BY hit_count, last_accessed
+                    LIMIT max(0, min((SELECT COUNT(*) FROM {table}) - ?, ?))
+                    """,
+                    (max_rows,),
+                )
+
+        if max_bytes > 0:
+            excess = self._cached_bytes() - max_bytes
+            if excess > 0:
+                removed += self._evict_batches(
+                    f"""
+                    SELECT table_name, cache_key, size FROM (
+                        SELECT '{EXPLANATION_TABLE}' AS table_name, cache_key,
+                            {ROW_BYTES[EXPLANATION_TABLE]} AS size, hit_count, last_accessed
+                        FROM {EXPLANATION_TABLE}
+                        UNION ALL
+                        SELECT '{CHAT_TABLE}', cache_key, {ROW_BYTES[CHAT_TABLE]}, hit_count, last_accessed
+                        FROM {CHAT_TABLE}
+                    )
+                    ORDER BY hit_count, last_accessed
+                    LIMIT ?
+                    """,
+                    (),
+                    bytes_to_free=excess,
+                )
+
+        if removed:
+            with self._connect() as conn:
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+        return removed
+
+    def _evict_batches(self, select_sql: str, params: Tuple, bytes_to_free: Optional[int] = None) -> List[EntryKey]:
+        """
+        Delete the (table, cache_key, size) rows *select_sql* yields, one
+        LIMIT-sized batch per transaction, until it runs dry or enough bytes
+        are freed.
+        """
+        removed: List[EntryKey] = []
+        while bytes_to_free is None or bytes_to_free > 0:
+            with self._connect() as conn:
+                rows: List[Tuple[str, str, int]] = conn.execute(select_sql, params + (EVICTION_BATCH,)).fetchall()
+                if bytes_to_free is not None:
+                    # Only as many of the least used rows as are needed.
+                    needed = []
+                    for row in rows:
+                        if bytes_to_free <= 0:
+                            break
+                        needed.append(row)
+                        bytes_to_free -= row[2]
+                    rows = needed
+                for table in TABLES:
+                    keys = [(cache_key,) for row_table, cache_key, _ in rows if row_table == table]
+                    conn.executemany(f"DELETE FROM {table} WHERE cache_key = ?", keys)
+                conn.commit()
+            removed.extend((table, cache_key) for table, cache_key, _ in rows)
+            if len(rows) < EVICTION_BATCH:
+                break
+            time.sleep(EVICTION_PAUSE)
+        return removed
+
+    def _cached_bytes(self) -> int:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"""
+                SELECT
+                    (SELECT COALESCE(SUM({ROW_BYTES[EXPLANATION_TABLE]}), 0) FROM {EXPLANATION_TABLE}),
+                    (SELECT COALESCE(SUM({ROW_BYTES[CHAT_TABLE]}), 0) FROM {CHAT_TABLE})
+                """
+            ).fetchone()
+        return row[0] + row[1]
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT
+                    COUNT(*) as total_explanations,
+                    SUM(hit_count) as total_hits,
+                    (SELECT COUNT(*) FROM ai_chat_cache) as total_chat_cache,
+                    (SELECT SUM(hit_count) FROM ai_chat_cache) as total_chat_hits
+                FROM ai_explanations
+                """
+            ).fetchone()
+        return {
+            "explanations": row[0],
+            "explanation_hits": row[1] or 0,
+            "chats": row[2] or 0,
+            "chat_hits": row[3] or 0,
+        }
+
+
+# ---------------------------------------------------------------------------
+# In-memory
+
+
+class MemoryBackend(CacheBackend):
+    """Entries in a dict inside this process; nothing survives a restart."""
+
+    name = "memory"
+
+    def __init__(self):
+        # table -> cache_key -> record plus hit_count and last_accessed
+        self._tables: Dict[str, Dict[str, Dict[str, Any]]] = {table: {} for table in TABLES}
+        self._lock = threading.Lock()
+
+    def get(self, table: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._tables[table].get(cache_key)
+            return {field: entry.get(field) for field in RECORD_FIELDS[table]} if entry else None
+
+    def put(self, table: str, cache_key: str, record: Dict[str, Any]) -> None:
+        self.put_many(table, {cache_key: record})
+
+    def put_many(self, table: str, records: Dict[str, Dict[str, Any]], only_missing: bool = False) -> int:
+        now = time.time()
+        written = 0
+        with self._lock:
+            for cache_key, record in records.items():
+                previous = self._tables[table].get(cache_key)
+                if previous and only_missing:
+                    continue
+                entry = {field: record.get(field) for field in RECORD_FIELDS[table]}
+                entry["hit_count"] = previous["hit_count"] if previous else 0
+                entry["last_accessed"] = now
+                self._tables[table][cache_key] = entry
+                written += 1
+        return written
+
+    def add_hits(self, hits: Dict[EntryKey, int]) -> None:
+        now = time.time()
+        with self._lock:
+            for (table, cache_key), count in hits.items():
+                entry = self._tables[table].get(cache_key)
+                if entry:
+                    entry["hit_count"] += count
+                    entry["last_accessed"] = now
+
+    def iter_questions(self) -> Iterator[Tuple[str, str, str]]:
+        with self._lock:
+            rows = [
+                (cache_key, entry["language"], entry["canonical_question"])
+                for cache_key, entry in self._tables[CHAT_TABLE].items()
+                if entry.get("canonical_question")
+            ]
+        yield from rows
+
+    def evict(self, ttl_days: float, max_rows: int, max_bytes: int) -> List[EntryKey]:
+        removed: List[EntryKey] = []
+        with self._lock:
+            def least_used(keys):
+                return sorted(keys, key=lambda item: (self._tables[item[0]][item[1]]["hit_count"],
+                                                      self._tables[item[0]][item[1]]["last_accessed"]))
+
+            def drop(table: str, cache_key: str) -> None:
+                del self._tables[table][cache_key]
+                removed.append((table, cache_key))
+
+            if ttl_days > 0:
+                cutoff = time.time() - ttl_days * 86400
+                for table in TABLES:
+                    for cache_key in [key for key, entry in self._tables[table].items() if entry["last_accessed"] < cutoff]:
+                        drop(table, cache_key)
+
+            if max_rows > 0:
+                for table in TABLES:
+                    excess = len(self._tables[table]) - max_rows
+                    if excess > 0:
+                        for _, cache_key in least_used((table, key) for key in self._tables[table])[:excess]:
+                            drop(table, cache_key)
+
+            if max_bytes > 0:
+                sizes = {
+                    (table, key): _record_bytes(table, entry)
+                    for table in TABLES for key, entry in self._tables[table].items()
+                }
+                excess = sum(sizes.values()) - max_bytes
+                for entry_key in least_used(sizes):
+                    if excess <= 0:
+                        break
+                    excess -= sizes[entry_key]
+                    drop(*entry_key)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            explanations = self._tables[EXPLANATION_TABLE].values()
+            chats = self._tables[CHAT_TABLE].values()
+            return {
+                "explanations": len(explanations),
+                "explanation_hits": sum(entry["hit_count"] for entry in explanations),
+                "chats": len(chats),
+                "chat_hits": sum(entry["hit_count"] for entry in chats),
+            }
+
+
+# ---------------------------------------------------------------------------
+# Redis
+
+REDIS_URL = os.getenv("AI_CACHE_REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = os.getenv("AI_CACHE_REDIS_PREFIX", "icv:ai")
+
+
+class RedisBackend(CacheBackend):
+    """
+    Entries shared by every instance through a Redis-protocol server.
+
+    Each entry is a hash at ``{prefix}:{table}:{cache_key}`` that expires
+    ttl_days after its last access. A sorted set per table, scored by last
+    access, drives the row and byte limits (LRU: Redis keeps no cheap
+    hit-count ordering) and cleans up after expired hashes.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any = None, url: str = REDIS_URL, prefix: str = REDIS_PREFIX, ttl_days: float = 0):
+        if client is None:
+            if redis is None:
+                raise ImportError("AI_CACHE_BACKEND=redis needs the 'redis' package (pip install redis)")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = int(ttl_days * 86400) if ttl_days > 0 else None
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def _key(self, table: str, cache_key: str) -> str:
+        return f"{self.prefix}:{table}:{cache_key}"
+
+    def _index(self, table: str) -> str:
+        return f"{self.prefix}:{table}:index"
+
+    def _totals(self) -> str:
+        return f"{self.prefix}:hits"
+
+    def get(self, table: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        fields = RECORD_FIELDS[table]
+        values = self.client.hmget(self._key(table, cache_key), fields)
+        if values[0] is None:
+            return None
+        record = dict(zip(fields, values))
+        if table == EXPLANATION_TABLE:
+            record["include_examples"] = record["include_examples"] == "1"
+        return record
+
+    def put(self, table: str, cache_key: str, record: Dict[str, Any]) -> None:
+        self.put_many(table, {cache_key: record})
+
+    def put_many(self, table: str, records: Dict[str, Dict[str, Any]], only_missing: bool = False) -> int:
+        """Write all *records* (or only the missing ones) in one MULTI/EXEC block."""
+        now = time.time()
+        if only_missing:
+            pipe = self.client.pipeline(transaction=False)
+            for cache_key in records:
+                pipe.exists(self._key(table, cache_key))
+            records = {
+                cache_key: record
+                for (cache_key, record), exists in zip(records.items(), pipe.execute())
+                if not exists
+            }
+        if not records:
+            return 0
+        pipe = self.client.pipeline()
+        for cache_key, record in records.items():
+            key = self._key(table, cache_key)
+            mapping = {
+                field: ("1" if value is True else "0" if value is False else value)
+                for field, value in ((field, record.get(field)) for field in RECORD_FIELDS[table])
+                if value is not None
+            }
+            mapping["last_accessed"] = now
+            pipe.hset(key, mapping=mapping)
+            pipe.hsetnx(key, "hit_count", 0)
+            if self.ttl_seconds:
+                pipe.expire(key, self.ttl_seconds)
+            pipe.zadd(self._index(table), {cache_key: now})
+        pipe.execute()
+        return len(records)
+
+    def add_hits(self, hits: Dict[EntryKey, int]) -> None:
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        for (table, cache_key), count in hits.items():
+            key = self._key(table, cache_key)
+            pipe.hincrby(key, "hit_count", count)
+            pipe.hset(key, "last_accessed", now)
+            if self.ttl_seconds:
+                pipe.expire(key, self.ttl_seconds)
+            pipe.zadd(self._index(table), {cache_key: now}, xx=True)
+            pipe.hincrby(self._totals(), table, count)
+        pipe.execute()
+        # HINCRBY recreates hashes that expired meanwhile; drop those stubs.
+        keys = [self._key(table, cache_key) for table, cache_key in hits]
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hexists(key, "language")
+        stubs = [key for key, exists in zip(keys, pipe.execute()) if not exists]
+        if stubs:
+            self.client.delete(*stubs)
+
+    def iter_questions(self) -> Iterator[Tuple[str, str, str]]:
+        cache_keys = self.client.zrange(self._index(CHAT_TABLE), 0, -1)
+        for start in range(0, len(cache_keys), EVICTION_BATCH):
+            batch = cache_keys[start : start + EVICTION_BATCH]
+            pipe = self.client.pipeline(transaction=False)
+            for cache_key in batch:
+                pipe.hmget(self._key(CHAT_TABLE, cache_key), ("language", "canonical_question"))
+            for cache_key, (language, canonical_question) in zip(batch, pipe.execute()):
+                if canonical_question:
+                    yield cache_key, language, canonical_question
+
+    def evict(self, ttl_days: float, max_rows: int, max_bytes: int) -> List[EntryKey]:
+        removed: List[EntryKey] = []
+        for table in TABLES:
+            index = self._index(table)
+            if ttl_days > 0:
+                cutoff = time.time() - ttl_days * 86400
+                while True:
+                    batch = self.client.zrangebyscore(index, "-inf", cutoff, start=0, num=EVICTION_BATCH)
+                    if not batch:
+                        break
+                    removed += self._delete(table, batch)
+                    time.sleep(EVICTION_PAUSE)
+            if max_rows > 0:
+                while True:
+                    excess = self.client.zcard(index) - max_rows
+                    if excess <= 0:
+                        break
+                    removed += self._delete(table, self.client.zrange(index, 0, min(excess, EVICTION_BATCH) - 1))
+                    time.sleep(EVICTION_PAUSE)
+        if max_bytes > 0:
+            removed += self._evict_bytes(max_bytes)
+        return removed
+
+    def _evict_bytes(self, max_bytes: int) -> List[EntryKey]:
+        """Delete the least recently used entries until the cached text fits in *max_bytes*."""
+        entries: List[Tuple[float, str, str, int]] = []
+        for table in TABLES:
+            scored = self.client.zrange(self._index(table), 0, -1, withscores=True)
+            for start in range(0, len(scored), EVICTION_BATCH):
+                batch = scored[start : start + EVICTION_BATCH]
+                pipe = self.client.pipeline(transaction=False)
+                for cache_key, _ in batch:
+                    for field in TEXT_FIELDS[table]:
+                        pipe.hstrlen(self._key(table, cache_key), field)
+                sizes = pipe.execute()
+                width = len(TEXT_FIELDS[table])
+                for offset, (cache_key, score) in enumerate(batch):
+                    entries.append((score, table, cache_key, sum(sizes[offset * width : (offset + 1) * width])))
+
+        excess = sum(entry[3] for entry in entries) - max_bytes
+        victims: Dict[str, List[str]] = {table: [] for table in TABLES}
+        for _, table, cache_key, size in sorted(entries):
+            if excess <= 0:
+                break
+            victims[table].append(cache_key)
+            excess -= size
+
+        removed: List[EntryKey] = []
+        for table, cache_keys in victims.items():
+            for start in range(0, len(cache_keys), EVICTION_BATCH):
+                removed += self._delete(table, cache_keys[start : start + EVICTION_BATCH])
+                time.sleep(EVICTION_PAUSE)
+        return removed
+
+    def _delete(self, table: str, cache_keys: List[str]) -> List[EntryKey]:
+        pipe = self.client.pipeline(transaction=False)
+        for cache_key in cache_keys:
+            pipe.delete(self._key(table, cache_key))
+        pipe.zrem(self._index(table), *cache_keys)
+        pipe.execute()
+        return [(table, cache_key) for cache_key in cache_keys]
+
+    def claim_maintenance(self, lease: float) -> bool:
+        """A lease key naming the owning process, renewed on every claim."""
+        key = f"{self.prefix}:maintenance"
+        seconds = max(1, int(lease))
+        if self.client.set(key, self._owner, nx=True, ex=seconds):
+            return True
+        if self.client.get(key) == self._owner:
+            self.client.expire(key, seconds)
+            return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        totals = self.client.hgetall(self._totals())
+        return {
+            "explanations": self.client.zcard(self._index(EXPLANATION_TABLE)),
+            "explanation_hits": int(totals.get(EXPLANATION_TABLE, 0)),
+            "chats": self.client.zcard(self._index(CHAT_TABLE)),
+            "chat_hits": int(totals.get(CHAT_TABLE, 0)),
+        }
+
+    def clear(self) -> int:
+        """Delete every key under this backend's prefix; returns how many went."""
+        removed = 0
+        batch: List[str] = []
+        for key in self.client.scan_iter(match=f"{self.prefix}:*", count=EVICTION_BATCH):
+            batch.append(key)
+            if len(batch) >= EVICTION_BATCH:
+                removed += self.client.delete(*batch)
+                batch = []
+        if batch:
+            removed += self.client.delete(*batch)
+        return removed
+
+    def close(self) -> None:
+        self.client.close()
+
+
+# ---------------------------------------------------------------------------
+
+CACHE_BACKEND = os.getenv("AI_CACHE_BACKEND", "sqlite")
+
+
+def create_backend(db_path: Path, ttl_days: float = 0, name: str = CACHE_BACKEND) -> CacheBackend:
+    """The backend AI_CACHE_BACKEND names: sqlite (default), memory or redis."""
+    name = name.strip().lower()
+    if name == "sqlite":
+        return SQLiteBackend(db_path)
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        return RedisBackend(ttl_days=ttl_days)
+    raise ValueError(f"Unknown AI_CACHE_BACKEND {name!r} (expected sqlite, memory or redis)")
@@ -1,71 +1,145 @@
 """
 Caching service for AI explanations to reduce API costs.
 Caches explanations in SQLite database to serve 80% of requests without API calls.
+
+Storage is pluggable (see cache_backends): set AI_CACHE_BACKEND=redis to share
+one cache between instances, or memory for a throwaway per-process cache.
 """
 
-import sqlite3
+import atexit
+import os
 import hashlib
 import json
+import threading
+import time
+from collections import Counter, OrderedDict
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Any, Iterable, Optional, Dict, Tuple
+
+from .cache_backends import CHAT_TABLE, EXPLANATION_TABLE, CacheBackend, create_backend
+from .question_matching import CanonicalQuestion, QuestionIndex, canonicalize_question
 
-# Cache database path
+# Cache database path (SQLite backend)
 CACHE_DB = Path(__file__).parent.parent / "data" / "ai_cache.db"
 
+# In-process tier in front of the backend: entry count and seconds an entry is
+# served from memory before being re-read from the backend.
+MEMORY_CACHE_SIZE = int(os.getenv("AI_CACHE_MEMORY_SIZE", "1024"))
+MEMORY_CACHE_TTL = float(os.getenv("AI_CACHE_MEMORY_TTL", "3600"))
+
+# Hit counts are accumulated in memory and written once this many are pending
+# or this many seconds have passed since the last write.
+HIT_FLUSH_BATCH = 100
+HIT_FLUSH_INTERVAL = 30.0
+
+# Eviction limits (0 disables a limit): days since an entry was last read,
+# entries per table, and bytes of cached text across both tables.
+CACHE_TTL_DAYS = float(os.getenv("AI_CACHE_TTL_DAYS", "90"))
+CACHE_MAX_ROWS = int(os.getenv("AI_CACHE_MAX_ROWS", "50000"))
+CACHE_MAX_BYTES = int(os.getenv("AI_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# How often (seconds) the eviction job wakes up.
+EVICTION_INTERVAL = 300.0
+
+# What the AI service returns in place of an explanation when Gemini is
+# unavailable or fails. These are never cached.
+FALLBACK_EXPLANATIONS = {
+    "en": "AI service is not available. Please try again later.",
+    "hi": "AI सेवा उपलब्ध नहीं है। कृपया बाद में पुनः प्रयास करें।",
+}
+
+
+class MemoryTier:
+    """Thread-safe LRU map whose entries also expire after *ttl* seconds."""
+
+    def __init__(self, max_entries: int = MEMORY_CACHE_SIZE, ttl: float = MEMORY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, str], value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class ExplanationCache:
     """Cache for AI explanations to reduce Gemini API costs."""
 
-    def __init__(self, db_path: Path = CACHE_DB):
-        self.db_path = db_path
-        self._init_db()
+    def __init__(
+        self,
+        db_path: Path = CACHE_DB,
+        memory_entries: int = MEMORY_CACHE_SIZE,
+        backend: Optional[CacheBackend] = None
+    ):
+        self.backend = backend if backend is not None else create_backend(db_path, CACHE_TTL_DAYS)
+        self._memory = MemoryTier(memory_entries)
+        self._pending_hits: Counter = Counter()
+        self._pending_total = 0
+        self._hits_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._questions = QuestionIndex()
+        self._evictor: Optional[threading.Thread] = None
+        self.refresh_question_index()
 
-    def _init_db(self):
-        """Initialize cache database with schema."""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS ai_explanations (
-                    cache_key TEXT PRIMARY KEY,
-                    section_text_hash TEXT NOT NULL,
-                    language TEXT NOT NULL,
-                    include_examples BOOLEAN NOT NULL,
-                    simple_explanation TEXT NOT NULL,
-                    examples TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    hit_count INTEGER DEFAULT 0
-                )
-            """)
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_hash 
-                ON ai_explanations(section_text_hash)
-            """)
-            
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS ai_chat_cache (
-                    cache_key TEXT PRIMARY KEY,
-                    question_hash TEXT NOT NULL,
-                    language TEXT NOT NULL,
-                    answer TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    hit_count INTEGER DEFAULT 0
-                )
-            """)
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_question 
-                ON ai_chat_cache(question_hash)
-            """)
-            
-            conn.commit()
+    def refresh_question_index(self) -> None:
+        """
+        Sync the paraphrase index with the chat questions in the backend.
+
+        Runs at startup and then with every eviction pass, so questions other
+        processes cached (in a shared backend) become matchable and removed
+        ones drop out.
+        """
+        stale = self._questions.keys()
+        for cache_key, language, canonical_question in self.backend.iter_questions():
+            stale.discard(cache_key)
+            self._questions.add(cache_key, CanonicalQuestion.from_key(canonical_question), language)
+        for cache_key in stale:
+            self._questions.remove(cache_key)
+
+    def close(self) -> None:
+        """Release the backend's connections."""
+        self.backend.close()
 
     def _generate_key(self, text: str, language: str, include_examples: bool = False) -> str:
         """Generate cache key from section text and parameters."""
         text_hash = hashlib.md5(text.encode()).hexdigest()
         return f"{text_hash}:{language}:{int(include_examples)}"
 
+    def _generate_chat_key(self, question: str, language: str) -> str:
+        """Generate cache key from the canonical form of a chat question."""
+        return self._chat_key(canonicalize_question(question), question, language)
+
+    def _chat_key(self, canonical: CanonicalQuestion, question: str, language: str) -> str:
+        # Questions with nothing left after canonicalization keep their own text.
+        text = canonical.key if canonical.acts or canonical.sections or canonical.terms else question.lower()
+        question_hash = hashlib.md5(text.encode()).hexdigest()
+        return f"{question_hash}:{language}"
+
     def get_explanation(
         self,
         section_text: str,
@@ -79,32 +153,21 @@ class ExplanationCache:
             Cached explanation dict or None if not found
         """
         cache_key = self._generate_key(section_text, language, include_examples)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                """
-                SELECT simple_explanation, examples 
-                FROM ai_explanations 
-                WHERE cache_key = ?
-                """,
-                (cache_key,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                # Increment hit counter
-                conn.execute(
-                    "UPDATE ai_explanations SET hit_count = hit_count + 1 WHERE cache_key = ?",
-                    (cache_key,)
-                )
-                conn.commit()
-                
-                return {
-                    "simple_explanation": row[0],
-                    "examples": row[1] or ""
-                }
-        
-        return None
+        memory_key = (EXPLANATION_TABLE, cache_key)
+
+        explanation = self._memory.get(memory_key)
+        if explanation is None:
+            record = self.backend.get(EXPLANATION_TABLE, cache_key)
+            if not record:
+                return None
+            explanation = {
+                "simple_explanation": record["simple_explanation"],
+                "examples": record["examples"] or ""
+            }
+            self._memory.put(memory_key, explanation)
+
+        self._record_hit(memory_key)
+        return dict(explanation)
 
     def set_explanation(
         self,
@@ -116,91 +179,203 @@ class ExplanationCache:
         """Cache an explanation for future use."""
         cache_key = self._generate_key(section_text, language, include_examples)
         text_hash = hashlib.md5(section_text.encode()).hexdigest()
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO ai_explanations 
-                (cache_key, section_text_hash, language, include_examples, 
-                 simple_explanation, examples, hit_count)
-                VALUES (?, ?, ?, ?, ?, ?, 
-                    COALESCE((SELECT hit_count FROM ai_explanations WHERE cache_key = ?), 0))
-                """,
-                (
-                    cache_key,
-                    text_hash,
-                    language,
-                    include_examples,
-                    explanation["simple_explanation"],
-                    explanation.get("examples", ""),
-                    cache_key
-                )
-            )
-            conn.commit()
+
+        self.backend.put(
+            EXPLANATION_TABLE,
+            cache_key,
+            {
+                "section_text_hash": text_hash,
+                "language": language,
+                "include_examples": include_examples,
+                "simple_explanation": explanation["simple_explanation"],
+                "examples": explanation.get("examples", ""),
+            }
+        )
+
+        self._memory.put(
+            (EXPLANATION_TABLE, cache_key),
+            {"simple_explanation": explanation["simple_explanation"], "examples": explanation.get("examples") or ""},
+        )
+
+    def import_explanations(
+        self,
+        explanations: Iterable[Tuple[str, str, bool, Dict[str, str]]],
+        replace: bool = False
+    ) -> int:
+        """
+        Cache many (section_text, language, include_examples, explanation)
+        entries in one backend write (a single transaction on SQLite).
+
+        Entries already cached are kept (with their access time) unless
+        *replace* is set. Returns the number of entries written.
+        """
+        records = {}
+        for section_text, language, include_examples, explanation in explanations:
+            cache_key = self._generate_key(section_text, language, include_examples)
+            records[cache_key] = {
+                "section_text_hash": hashlib.md5(section_text.encode()).hexdigest(),
+                "language": language,
+                "include_examples": include_examples,
+                "simple_explanation": explanation["simple_explanation"],
+                "examples": explanation.get("examples", ""),
+            }
+        if not records:
+            return 0
+
+        written = self.backend.put_many(EXPLANATION_TABLE, records, only_missing=not replace)
+        if replace:
+            for cache_key in records:
+                self._memory.discard((EXPLANATION_TABLE, cache_key))
+        return written
 
     def get_chat_answer(self, question: str, language: str) -> Optional[str]:
-        """Get cached chat answer if available."""
-        question_hash = hashlib.md5(question.lower().encode()).hexdigest()
-        cache_key = f"{question_hash}:{language}"
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT answer FROM ai_chat_cache WHERE cache_key = ?",
-                (cache_key,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                # Increment hit counter
-                conn.execute(
-                    "UPDATE ai_chat_cache SET hit_count = hit_count + 1 WHERE cache_key = ?",
-                    (cache_key,)
-                )
-                conn.commit()
-                return row[0]
-        
-        return None
+        """
+        Get cached chat answer if available.
+
+        Questions are matched on their canonical form first, then against
+        similar cached questions about the same acts and sections.
+        """
+        canonical = canonicalize_question(question)
+        cache_key = self._chat_key(canonical, question, language)
+        memory_key = (CHAT_TABLE, cache_key)
+
+        answer = self._memory.get(memory_key)
+        if answer is not None:
+            self._record_hit(memory_key)
+            return answer
+
+        hit_key = cache_key
+        record = self.backend.get(CHAT_TABLE, cache_key)
+        if not record:
+            # Rows cached before canonical keys existed are found by the raw question hash.
+            question_hash = hashlib.md5(question.lower().encode()).hexdigest()
+            found = self.backend.find_chat_by_question_hash(question_hash, language)
+            if found:
+                hit_key, record = found
+        if not record:
+            hit_key = self._questions.find(canonical, language)
+            if hit_key is None:
+                return None
+            answer = self._memory.get((CHAT_TABLE, hit_key))
+            if answer is not None:
+                self._record_hit((CHAT_TABLE, hit_key))
+                return answer
+            record = self.backend.get(CHAT_TABLE, hit_key)
+            if not record:
+                return None
+
+        answer = record["answer"]
+        # Kept under the entry actually hit (not the query's key), so evicting
+        # that entry also drops this copy.
+        self._memory.put((CHAT_TABLE, hit_key), answer)
+        self._record_hit((CHAT_TABLE, hit_key))
+        return answer
 
     def set_chat_answer(self, question: str, language: str, answer: str) -> None:
         """Cache a chat answer for future use."""
+        canonical = canonicalize_question(question)
+        cache_key = self._chat_key(canonical, question, language)
         question_hash = hashlib.md5(question.lower().encode()).hexdigest()
-        cache_key = f"{question_hash}:{language}"
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO ai_chat_cache 
-                (cache_key, question_hash, language, answer, hit_count)
-                VALUES (?, ?, ?, ?,
-                    COALESCE((SELECT hit_count FROM ai_chat_cache WHERE cache_key = ?), 0))
-                """,
-                (cache_key, question_hash, language, answer, cache_key)
+
+        self.backend.put(
+            CHAT_TABLE,
+            cache_key,
+            {
+                "question_hash": question_hash,
+                "language": language,
+                "answer": answer,
+                "canonical_question": canonical.key,
+            }
+        )
+
+        self._memory.put((CHAT_TABLE, cache_key), answer)
+        self._questions.add(cache_key, canonical, language)
+
+    def _record_hit(self, memory_key: Tuple[str, str]) -> None:
+        """Count a hit in memory, writing the counts out in batches."""
+        with self._hits_lock:
+            self._pending_hits[memory_key] += 1
+            self._pending_total += 1
+            due = (
+                self._pending_total >= HIT_FLUSH_BATCH
+                or time.monotonic() - self._last_flush >= HIT_FLUSH_INTERVAL
             )
-            conn.commit()
+        if due:
+            self.flush_hits()
+
+    def flush_hits(self) -> None:
+        """Add the pending hit counts to the backend in one batch."""
+        with self._hits_lock:
+            pending, self._pending_hits = self._pending_hits, Counter()
+            self._pending_total = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        self.backend.add_hits(pending)
+
+    # ------------------------------------------------------------------
+    # Eviction
+
+    def start_eviction(self, interval: float = EVICTION_INTERVAL) -> None:
+        """
+        Run :meth:`refresh_question_index` every *interval* seconds on a
+        daemon thread, and :meth:`evict` too in the one process holding the
+        backend's maintenance claim.
+        """
+        if self._evictor is not None:
+            return
+
+        def run() -> None:
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.backend.claim_maintenance(interval * 2):
+                        removed = self.evict()
+                        if removed:
+                            print(f"🧹 Evicted {removed} AI cache entries")
+                    self.refresh_question_index()
+                except Exception as e:
+                    print(f"❌ AI cache eviction error: {e}")
 
-    def get_stats(self) -> Dict[str, int]:
+        self._evictor = threading.Thread(target=run, name="ai-cache-eviction", daemon=True)
+        self._evictor.start()
+
+    def evict(
+        self,
+        ttl_days: float = CACHE_TTL_DAYS,
+        max_rows: int = CACHE_MAX_ROWS,
+        max_bytes: int = CACHE_MAX_BYTES
+    ) -> int:
+        """
+        Delete expired entries, then the least used ones while over a limit.
+
+        Entries are ranked by hit count and then by last access (LFU with an
+        LRU tie-break) where the backend tracks both. Works in small batches;
+        returns the number removed.
+        """
+        self.flush_hits()
+        removed = self.backend.evict(ttl_days, max_rows, max_bytes)
+        for table, cache_key in removed:
+            self._memory.discard((table, cache_key))
+            if table == CHAT_TABLE:
+                self._questions.remove(cache_key)
+        return len(removed)
+
+    def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                """
-                SELECT 
-                    COUNT(*) as total_explanations,
-                    SUM(hit_count) as total_hits,
-                    (SELECT COUNT(*) FROM ai_chat_cache) as total_chat_cache,
-                    (SELECT SUM(hit_count) FROM ai_chat_cache) as total_chat_hits
-                FROM ai_explanations
-                """
-            )
-            row = cursor.fetchone()
-            
-            return {
-                "cached_explanations": row[0],
-                "explanation_hits": row[1] or 0,
-                "cached_chats": row[2] or 0,
-                "chat_hits": row[3] or 0,
-                "total_api_calls_saved": (row[1] or 0) + (row[3] or 0)
-            }
+        self.flush_hits()
+        stats = self.backend.stats()
+        return {
+            "backend": self.backend.name,
+            "cached_explanations": stats["explanations"],
+            "explanation_hits": stats["explanation_hits"],
+            "cached_chats": stats["chats"],
+            "chat_hits": stats["chat_hits"],
+            "total_api_calls_saved": stats["explanation_hits"] + stats["chat_hits"]
+        }
 
 
 # Global cache instance
 explanation_cache = ExplanationCache()
+atexit.register(explanation_cache.flush_hits)
@@ -0,0 +1,143 @@
+"""Versioned corpus manifests and compressed delta packages for the mobile client.
+
+A manifest lists every act's sections with a short content hash. Manifests
+are published to ``data/manifests/<version>.json`` so that, once the corpus
+is regenerated, a client still holding an older version can be sent only the
+sections that were changed, added or removed since.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .data_loader import ROOT, ActRegistry
+from .response_cache import CachedResponse, to_section_detail
+
+MANIFEST_DIR = ROOT / "data" / "manifests"
+# Number of recently requested delta packages kept compressed in memory.
+DELTA_CACHE_SIZE = 16
+
+Manifest = Dict[str, Any]
+
+
+def build_manifest(registry: ActRegistry) -> Manifest:
+    return {
+        "version": registry.version,
+        "acts": {
+            act.act_id: {
+                "title": act.title,
+                "content_hash": act.content_hash,
+                "sections": [[record.number, section_hash] for record, section_hash in zip(act.records, act.section_hashes)],
+            }
+            for act in registry.list_acts()
+        },
+    }
+
+
+class CorpusSync:
+    """Publishes the current manifest and computes deltas from older ones."""
+
+    def __init__(self, registry: ActRegistry, manifest_dir: Path = MANIFEST_DIR) -> None:
+        self.registry = registry
+        self.manifest_dir = manifest_dir
+        self.manifest = build_manifest(registry)
+        self.manifest_body = json.dumps(self.manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.manifest_response = CachedResponse(body=self.manifest_body).compress()
+        self._deltas: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        return self.registry.version
+
+    def publish(self) -> Optional[Path]:
+        """Write the current manifest to the manifest directory (best effort)."""
+        path = self.manifest_dir / f"{self.version}.json"
+        if path.exists():
+            return path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(self.manifest_body)
+        except OSError as exc:
+            print(f"⚠️  Could not publish corpus manifest: {exc}")
+            return None
+        return path
+
+    def known_version(self, version: Optional[str]) -> Optional[str]:
+        """*version* if a manifest for it exists, else None."""
+        if not version:
+            return None
+        if version == self.version:
+            return version
+        if not version.isalnum() or not (self.manifest_dir / f"{version}.json").exists():
+            return None
+        return version
+
+    def load_manifest(self, version: str) -> Optional[Manifest]:
+        if version == self.version:
+            return self.manifest
+        if not self.known_version(version):
+            return None
+        with (self.manifest_dir / f"{version}.json").open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    # ------------------------------------------------------------------
+    def delta(self, since: Optional[str]) -> bytes:
+        """Gzip-compressed JSON package bringing a client at *since* up to date.
+
+        Unknown (or missing) versions get a full package with every section,
+        cached once under the empty key however many versions ask for it.
+        """
+        key = self.known_version(since) or ""
+        with self._lock:
+            cached = self._deltas.get(key)
+            if cached is not None:
+                self._deltas.move_to_end(key)
+                return cached
+        old = self.load_manifest(key) if key else None
+        package = gzip.compress(
+            json.dumps(self._build_delta(key or None, old), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        )
+        with self._lock:
+            self._deltas[key] = package
+            while len(self._deltas) > DELTA_CACHE_SIZE:
+                self._deltas.popitem(last=False)
+        return package
+
+    def _build_delta(self, since: Optional[str], old: Optional[Manifest]) -> Dict[str, Any]:
+        old_acts = old["acts"] if old else {}
+        acts: Dict[str, Any] = {}
+        for act in self.registry.list_acts():
+            previous = old_acts.get(act.act_id)
+            if previous and previous["content_hash"] == act.content_hash:
+                continue
+            previous_hashes = dict(map(tuple, previous["sections"])) if previous else {}
+            changed: List[Dict[str, Any]] = []
+            added: List[Dict[str, Any]] = []
+            for record, section_hash in zip(act.records, act.section_hashes):
+                old_hash = previous_hashes.pop(record.number, None)
+                if old_hash == section_hash:
+                    continue
+                detail = to_section_detail(act.act_id, record).model_dump()
+                (added if old_hash is None else changed).append(detail)
+            entry: Dict[str, Any] = {
+                "title": act.title,
+                "content_hash": act.content_hash,
+                "changed": changed,
+                "added": added,
+                "removed": list(previous_hashes),
+            }
+            if added or previous_hashes:
+                entry["order"] = [record.number for record in act.records]
+            acts[act.act_id] = entry
+        return {
+            "from_version": since if old else None,
+            "to_version": self.version,
+            "full": old is None,
+            "acts": acts,
+            "removed_acts": [act_id for act_id in old_acts if self.registry.get_act(act_id) is None],
+        }
@@ -1,15 +1,35 @@
 """Utility helpers to load structured act data into memory."""
 from __future__ import annotations
 
+import base64
+import binascii
+import hashlib
 import json
+import os
 import re
+import sys
+import threading
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .search_index import HINDI_NORMALIZER_SCRIPT, SORT_RELEVANCE, InvertedIndex, Span, analyze_hindi, build_snippet
+from .snapshot import SNAPSHOT_PATH, SNAPSHOT_VERSION, Snapshot, TextSpan, compute_source_hash, write_snapshot
 
 ROOT = Path(__file__).resolve().parents[2]
 STRUCTURED_DIR = ROOT / "data" / "structured"
 
+# Code that shapes what a snapshot stores (records, analyzers, indexes). It is
+# hashed along with the data, so editing it invalidates existing snapshots.
+_APP_DIR = Path(__file__).resolve().parent
+SNAPSHOT_CODE_PATHS = (
+    _APP_DIR / "data_loader.py",
+    _APP_DIR / "search_index.py",
+    _APP_DIR / "snapshot.py",
+    HINDI_NORMALIZER_SCRIPT,
+)
+
 # Friendly titles for known act IDs. Falls back to the ID itself.
 ACT_TITLES = {
     "BNS-2023": "Bharatiya Nyaya Sanhita, 2023",
@@ -20,48 +40,294 @@ ACT_TITLES = {
 # Only load acts with complete content (CRPC and IPC have incomplete extraction)
 ALLOWED_ACTS = {"BNS-2023", "BNSS-2023", "BSA-2023"}
 
+# Leading hex digits of an act's content hash embedded in page cursors.
+CURSOR_VERSION_CHARS = 12
 
-@dataclass
+SEARCH_LANGUAGES = ("en", "hi")
+
+# Keep section texts in the memory-mapped snapshot instead of each worker's heap.
+SHARED_TEXT = os.getenv("REGISTRY_SHARED_TEXT", "").lower() in {"1", "true", "yes"}
+
+# Preview lengths served by the API (section listings and search results);
+# these are computed once at load, any other length goes through a bounded cache.
+DEFAULT_PREVIEW_CHARS = 240
+SNIPPET_PREVIEW_CHARS = 200
+STANDARD_PREVIEW_LENGTHS = (DEFAULT_PREVIEW_CHARS, SNIPPET_PREVIEW_CHARS)
+PREVIEW_CACHE_SIZE = 4096
+
+
+# eq=False keeps identity hashing so records can key the preview cache.
+@dataclass(slots=True, eq=False)
 class SectionRecord:
     number: str
     heading: str
     text_en: str
     text_hi: Optional[str] = None
+    _previews: Optional[Tuple[str, ...]] = field(default=None, init=False, repr=False)
 
-    def preview(self, max_chars: int = 240) -> str:
-        text = self.text_en.replace("\n", " ").strip()
-        if len(text) <= max_chars:
-            return text
-        return text[: max_chars - 1].rstrip() + "…"
+    def preview(self, max_chars: int = DEFAULT_PREVIEW_CHARS, lang: str = "en") -> str:
+        if self._previews is not None and max_chars in STANDARD_PREVIEW_LENGTHS:
+            slot = STANDARD_PREVIEW_LENGTHS.index(max_chars)
+            if lang == "hi":
+                slot += len(STANDARD_PREVIEW_LENGTHS)
+            return self._previews[slot]
+        return _cached_preview(self, max_chars, lang)
 
+    def precompute_previews(self) -> None:
+        english = self.text_en
+        hindi = self.text_hi or english
+        self._previews = tuple(_make_preview(english, n) for n in STANDARD_PREVIEW_LENGTHS) + tuple(
+            _make_preview(hindi, n) for n in STANDARD_PREVIEW_LENGTHS
+        )
 
-@dataclass
+
+def _make_preview(source: str, max_chars: int) -> str:
+    text = source.replace("\n", " ").strip()
+    if len(text) <= max_chars:
+        return text
+    return text[: max_chars - 1].rstrip() + "…"
+
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def _cached_preview(record: SectionRecord, max_chars: int, lang: str) -> str:
+    source = record.text_hi if lang == "hi" and record.text_hi else record.text_en
+    return _make_preview(source, max_chars)
+
+
+class MappedSectionRecord(SectionRecord):
+    """A section whose texts are decoded from the shared snapshot mapping on access."""
+
+    __slots__ = ("_snapshot", "_en_span", "_hi_span")
+
+    def __init__(self, number: str, heading: str, snapshot: Snapshot, en_span: TextSpan, hi_span: Optional[TextSpan]) -> None:
+        self.number = number
+        self.heading = heading
+        self._previews = None
+        self._snapshot = snapshot
+        self._en_span = en_span
+        self._hi_span = hi_span
+
+    @property
+    def text_en(self) -> str:  # type: ignore[override]
+        return self._snapshot.read_text(self._en_span)
+
+    @property
+    def text_hi(self) -> Optional[str]:  # type: ignore[override]
+        return self._snapshot.read_text(self._hi_span) if self._hi_span else None
+
+
+@dataclass(slots=True)
 class ActRecord:
+    """An act's sections stored contiguously in statutory order.
+
+    ``ordinals`` maps a section number to its position in ``records`` so
+    lookups are a dict hit and page slices are a contiguous list range.
+    """
+
     act_id: str
     title: str
-    sections: Dict[str, SectionRecord] = field(default_factory=dict)
-    order: List[str] = field(default_factory=list)
+    records: List[SectionRecord] = field(default_factory=list)
+    ordinals: Dict[str, int] = field(default_factory=dict)
     languages: List[str] = field(default_factory=lambda: ["en"])
+    # Hex digests filled in by compute_content_hash(): one per record (same
+    # order) over its heading and texts, and one for the whole act.
+    section_hashes: List[str] = field(default_factory=list)
+    content_hash: str = ""
+
+    @property
+    def section_count(self) -> int:
+        return len(self.records)
+
+    def add_section(self, record: SectionRecord) -> bool:
+        """Append *record*; returns False if its number is already present."""
+        if record.number in self.ordinals:
+            return False
+        record.number = sys.intern(record.number)
+        record.heading = sys.intern(record.heading)
+        self.ordinals[record.number] = len(self.records)
+        self.records.append(record)
+        return True
+
+    def get_section(self, number: str) -> Optional[SectionRecord]:
+        ordinal = self.ordinals.get(number)
+        return self.records[ordinal] if ordinal is not None else None
+
+    def slice_sections(self, offset: int, limit: int) -> List[SectionRecord]:
+        return self.records[offset : offset + limit]
+
+    def iter_sections_from(self, ordinal: int) -> Iterator[SectionRecord]:
+        """Sections from position *ordinal* onwards, without copying the list."""
+        for index in range(ordinal, len(self.records)):
+            yield self.records[index]
+
+    def cursor_at(self, ordinal: int) -> Optional[str]:
+        """Opaque cursor for resuming at position *ordinal*, or None at the end.
+
+        It carries the act version, the ordinal and the number of the section
+        just before it, so a cursor from an older version of the act resumes
+        after that same section rather than at a shifted position.
+        """
+        if ordinal <= 0 or ordinal >= len(self.records):
+            return None
+        token = f"{self.content_hash[:CURSOR_VERSION_CHARS]}:{ordinal}:{self.records[ordinal - 1].number}"
+        return base64.urlsafe_b64encode(token.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+    def resolve_cursor(self, cursor: str) -> int:
+        """Position a cursor from :meth:`cursor_at` points to; ValueError if malformed."""
+        try:
+            token = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError) as exc:
+            raise ValueError("malformed cursor") from exc
+        parts = token.split(":", 2)
+        if len(parts) != 3 or not parts[1].isdigit():
+            raise ValueError("malformed cursor")
+        version, ordinal, number = parts[0], int(parts[1]), parts[2]
+        if version == self.content_hash[:CURSOR_VERSION_CHARS]:
+            return min(ordinal, len(self.records))
+        previous = self.ordinals.get(number)
+        if previous is not None:
+            return previous + 1
+        # The section was removed since the cursor was issued; keep the position.
+        return min(ordinal, len(self.records))
+
+    def compute_content_hash(self) -> str:
+        self.section_hashes = [_section_hash(record) for record in self.records]
+        digest = hashlib.sha256(f"{self.act_id}\0{self.title}\0{','.join(sorted(self.languages))}".encode("utf-8"))
+        for record, section_hash in zip(self.records, self.section_hashes):
+            digest.update(f"\0{record.number}:{section_hash}".encode("utf-8"))
+        self.content_hash = digest.hexdigest()
+        return self.content_hash
 
     def iter_sections(self, section_numbers: Optional[Iterable[str]] = None) -> Iterable[SectionRecord]:
         if section_numbers is None:
-            for number in self.order:
-                yield self.sections[number]
+            yield from self.records
         else:
             for number in section_numbers:
-                if number in self.sections:
-                    yield self.sections[number]
+                ordinal = self.ordinals.get(number)
+                if ordinal is not None:
+                    yield self.records[ordinal]
+
+
+def _section_hash(record: SectionRecord) -> str:
+    digest = hashlib.sha256()
+    for value in (record.heading, record.text_en, record.text_hi or ""):
+        digest.update(value.encode("utf-8") + b"\0")
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class SectionHit:
+    act: ActRecord
+    record: SectionRecord
+    score: float
+    snippet: str
+    # Character ranges of matched terms within ``snippet`` and the heading.
+    highlights: List[Span] = field(default_factory=list)
+    heading_highlights: List[Span] = field(default_factory=list)
+
+
+@dataclass
+class SearchResults:
+    total: int
+    hits: List[SectionHit] = field(default_factory=list)
 
 
 class ActRegistry:
-    """Loads act data from the structured JSON files and serves queries."""
+    """Loads act data from the structured JSON files and serves queries.
 
-    def __init__(self, data_dir: Path = STRUCTURED_DIR) -> None:
+    When a snapshot compiled from the same source files exists at
+    *snapshot_path* (see ``build_snapshot.py``) it is used instead of parsing
+    the JSON, and its search indexes are only loaded on the first search.
+    With *shared_text* the section texts stay in the snapshot mapping, so
+    all workers share one copy of the corpus.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path = STRUCTURED_DIR,
+        snapshot_path: Optional[Path] = SNAPSHOT_PATH,
+        shared_text: bool = SHARED_TEXT,
+    ) -> None:
         self.data_dir = data_dir
+        self.shared_text = shared_text
         self.acts: Dict[str, ActRecord] = {}
-        self._load()
+        self.source_hash = self._compute_source_hash()
+        self._indexes: Optional[Dict[str, InvertedIndex]] = None
+        self._index_lock = threading.Lock()
+        self._snapshot = Snapshot.open(snapshot_path, self.source_hash) if snapshot_path else None
+        # Whether the acts came from a snapshot rather than the JSON files.
+        self.loaded_from_snapshot = self._snapshot is not None
+        if self._snapshot:
+            self._load_snapshot(self._snapshot)
+        else:
+            self._load()
+            self._indexes = self._build_indexes()
+        self._precompute_previews()
+        # Identifies the loaded corpus; changes whenever any act's content does.
+        self.version = hashlib.sha256(
+            "".join(act.compute_content_hash() for act in self.acts.values()).encode("ascii")
+        ).hexdigest()
+        self.last_modified = max((path.stat().st_mtime for path in self._source_paths()), default=0.0)
+
+    @property
+    def index(self) -> InvertedIndex:
+        return self._get_indexes()["en"]
+
+    @property
+    def hindi_index(self) -> InvertedIndex:
+        return self._get_indexes()["hi"]
+
+    def save_snapshot(self, path: Path = SNAPSHOT_PATH) -> None:
+        acts = (
+            (
+                act.act_id,
+                act.title,
+                act.languages,
+                [(r.number, r.heading, r.text_en, r.text_hi) for r in act.iter_sections()],
+            )
+            for act in self.acts.values()
+        )
+        write_snapshot(path, self.source_hash, acts, self._get_indexes())
 
     # ------------------------------------------------------------------
+    def _source_paths(self) -> List[Path]:
+        return sorted(self.data_dir.glob("*_en.json")) + sorted(self.data_dir.glob("*_bilingual.jsonl"))
+
+    def _compute_source_hash(self) -> bytes:
+        return compute_source_hash(
+            self._source_paths() + list(SNAPSHOT_CODE_PATHS),
+            salt=f"{SNAPSHOT_VERSION}:{','.join(sorted(ALLOWED_ACTS))}",
+        )
+
+    def _load_snapshot(self, snapshot: Snapshot) -> None:
+        if self.shared_text:
+            self._load_mapped_snapshot(snapshot)
+            return
+        for act_id, title, languages, rows in snapshot.iter_acts():
+            act = ActRecord(act_id=act_id, title=title, languages=languages)
+            for number, heading, text_en, text_hi in rows:
+                act.add_section(SectionRecord(number=number, heading=heading, text_en=text_en, text_hi=text_hi))
+            self.acts[act_id] = act
+
+    def _load_mapped_snapshot(self, snapshot: Snapshot) -> None:
+        for act_id, title, languages, rows in snapshot.iter_act_spans():
+            act = ActRecord(act_id=act_id, title=title, languages=languages)
+            for number, heading, en_span, hi_span in rows:
+                act.add_section(MappedSectionRecord(number, heading, snapshot, en_span, hi_span))
+            self.acts[act_id] = act
+
+    def _precompute_previews(self) -> None:
+        for act in self.acts.values():
+            for record in act.iter_sections():
+                record.precompute_previews()
+
+    def _get_indexes(self) -> Dict[str, InvertedIndex]:
+        if self._indexes is None:
+            with self._index_lock:
+                if self._indexes is None:
+                    self._indexes = self._snapshot.load_indexes() if self._snapshot else self._build_indexes()
+        return self._indexes
+
     def _load(self) -> None:
         for en_path in sorted(self.data_dir.glob("*_en.json")):
             with en_path.open("r", encoding="utf-8") as handle:
@@ -77,12 +343,11 @@ class ActRegistry:
 
             for raw in payload.get("sections", []):
                 number = _normalize_section_number(raw.get("section_number"))
-                if not number or number in act.sections:
+                if not number:
                     continue
                 heading = (raw.get("heading") or "").strip()
                 text_en = (raw.get("text") or "").strip()
-                act.sections[number] = SectionRecord(number=number, heading=heading, text_en=text_en)
-                act.order.append(number)
+                act.add_section(SectionRecord(number=number, heading=heading, text_en=text_en))
 
             self._merge_bilingual_text(act, en_path)
             self.acts[act_id] = act
@@ -103,12 +368,25 @@ class ActRegistry:
                 number = _normalize_section_number(data.get("section_number"))
                 if not number:
                     continue
-                record = act.sections.get(number)
+                record = act.get_section(number)
                 if record:
                     text_hi = (data.get("text_hi") or "").strip()
                     if text_hi:
                         record.text_hi = text_hi
 
+    def _build_indexes(self) -> Dict[str, InvertedIndex]:
+        index = InvertedIndex()
+        hindi_index = InvertedIndex(analyzer=analyze_hindi)
+        for act in self.acts.values():
+            for record in act.iter_sections():
+                index.add_document(act.act_id, record.number, record.heading, record.text_en)
+                # Sections without Hindi text still get a document id so both
+                # indexes share the same act ranges.
+                hindi_index.add_document(act.act_id, record.number, "", record.text_hi or "")
+        index.finalize()
+        hindi_index.finalize()
+        return {"en": index, "hi": hindi_index}
+
     # ------------------------------------------------------------------
     def list_acts(self) -> List[ActRecord]:
         return list(self.acts.values())
@@ -125,25 +403,56 @@ class ActRegistry:
         number = _normalize_section_number(section_number)
         if not number:
             return None
-        return act.sections.get(number)
-
-    def search(self, query: str, act_id: Optional[str] = None, limit: int = 20) -> List[tuple[ActRecord, SectionRecord]]:
-        if not query:
-            return []
-        query_lc = query.lower()
-        matches: List[tuple[ActRecord, SectionRecord]] = []
-        acts = [self.get_act(act_id)] if act_id else self.acts.values()
-        for act in acts:
+        return act.get_section(number)
+
+    def section_ordinal(self, act: ActRecord, section_number: str) -> Optional[int]:
+        number = _normalize_section_number(section_number)
+        return act.ordinals.get(number) if number else None
+
+    def iter_sections(self, act: ActRecord, section_numbers: Optional[Iterable[str]] = None) -> Iterable[SectionRecord]:
+        """Sections of *act* in statutory order, or those listed (normalized, unknown ones skipped)."""
+        if section_numbers is None:
+            return act.iter_sections()
+        numbers = (_normalize_section_number(number) for number in section_numbers)
+        return act.iter_sections(number for number in numbers if number)
+
+    def search(
+        self,
+        query: str,
+        act_id: Optional[str] = None,
+        limit: int = 20,
+        sort: str = SORT_RELEVANCE,
+        lang: str = "en",
+    ) -> SearchResults:
+        if not query or lang not in SEARCH_LANGUAGES:
+            return SearchResults(total=0)
+        if act_id:
+            act = self.get_act(act_id)
             if not act:
-                continue
-            for number in act.order:
-                record = act.sections[number]
-                haystack = f"{record.heading}\n{record.text_en}".lower()
-                if query_lc in haystack:
-                    matches.append((act, record))
-                    if len(matches) >= limit:
-                        return matches
-        return matches
+                return SearchResults(total=0)
+            act_id = act.act_id
+        index = self.hindi_index if lang == "hi" else self.index
+        total, matches = index.search(query, act_id=act_id, sort=sort, limit=limit)
+        results = SearchResults(total=total)
+        for match in matches:
+            doc_act_id, number = index.doc_keys[match.doc_id]
+            act = self.acts[doc_act_id]
+            record = act.get_section(number)
+            heading_spans, body_spans = index.match_spans(match.doc_id, match.terms)
+            body = (record.text_hi if lang == "hi" else record.text_en) or ""
+            snippet = build_snippet(body, body_spans, SNIPPET_PREVIEW_CHARS)
+            text, highlights = snippet if snippet else (record.preview(SNIPPET_PREVIEW_CHARS, lang=lang), [])
+            results.hits.append(
+                SectionHit(
+                    act=act,
+                    record=record,
+                    score=match.score,
+                    snippet=text,
+                    highlights=highlights,
+                    heading_highlights=heading_spans,
+                )
+            )
+        return results
 
 
 def _normalize_section_number(value: Optional[str]) -> Optional[str]:
@@ -0,0 +1,69 @@
+"""Warm the AI explanation cache from the bundles generate_all_explanations.py writes.
+
+Each bundle holds one act's explanations in one language, keyed by section
+number. Entries are cached under the registry's text for that section, the
+text the generator explained and clients send to /api/explain.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from .cache_service import FALLBACK_EXPLANATIONS, ExplanationCache
+from .data_loader import ROOT, ActRegistry
+
+BUNDLE_DIR = Path(os.getenv("AI_EXPLANATION_BUNDLES", str(ROOT / "mobile" / "assets" / "ai_explanations")))
+BUNDLE_PATTERN = "*_explanations_*.json"
+# Import the bundles into the cache when the server starts.
+IMPORT_ON_STARTUP = os.getenv("AI_CACHE_IMPORT_BUNDLES", "1").lower() in {"1", "true", "yes"}
+
+# The generator always asks for examples.
+BUNDLE_INCLUDE_EXAMPLES = True
+
+BundleEntry = Tuple[str, str, bool, Dict[str, str]]
+
+
+def iter_bundle_entries(registry: ActRegistry, bundle_dir: Path = BUNDLE_DIR) -> Iterator[BundleEntry]:
+    """(section_text, language, include_examples, explanation) for every usable bundle entry.
+
+    Entries the generator failed on (including fallback text written by
+    older bundles), and sections the registry no longer has, are skipped.
+    """
+    for path in sorted(bundle_dir.glob(BUNDLE_PATTERN)):
+        with path.open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        act_prefix, _, language = path.stem.rpartition("_explanations_")
+        act_id = payload.get("act_id") or act_prefix.replace("_", "-")
+        language = payload.get("language") or language
+
+        for number, entry in payload.get("explanations", {}).items():
+            explanation = entry.get("simple_explanation")
+            if entry.get("error") or not explanation or explanation in FALLBACK_EXPLANATIONS.values():
+                continue
+            section = registry.get_section(act_id, entry.get("section_number") or number)
+            if section is None or not section.text_en:
+                continue
+            yield (
+                section.text_en,
+                language,
+                BUNDLE_INCLUDE_EXAMPLES,
+                {"simple_explanation": explanation, "examples": entry.get("examples") or ""},
+            )
+
+
+def import_bundles(
+    cache: ExplanationCache,
+    registry: ActRegistry,
+    bundle_dir: Path = BUNDLE_DIR,
+    replace: bool = False,
+) -> int:
+    """Load the bundles in *bundle_dir* into *cache* in one write; returns the entries written.
+
+    Only sections not cached yet are written unless *replace* is set, so
+    repeated imports leave live explanations and their access times alone.
+    """
+    if not bundle_dir.is_dir():
+        return 0
+    return cache.import_explanations(iter_bundle_entries(registry, bundle_dir), replace=replace)
@@ -0,0 +1,155 @@
+"""HTTP validators (ETag / Last-Modified) for the read-only corpus endpoints.
+
+The corpus only changes when ``data/structured`` is regenerated, so every
+response can be validated against content hashes computed at registry load
+and a repeat request answered with ``304 Not Modified`` before any
+serialization happens.
+"""
+from __future__ import annotations
+
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from .data_loader import ActRecord
+from .response_cache import AVAILABLE_ENCODINGS
+
+# Clients may reuse a response for five minutes, then must revalidate.
+CACHE_CONTROL = "public, max-age=300, must-revalidate"
+# Bump when the shape of the cached JSON bodies changes without a data change.
+ETAG_REVISION = "1"
+# GZipMiddleware compresses bodies from this size up for clients whose
+# Accept-Encoding mentions gzip.
+GZIP_MINIMUM_SIZE = 1000
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str]) -> str:
+    """Pick the best of *available* content codings the client accepts ("identity" if none)."""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = "identity", 0.0
+    for coding in available:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def make_etag(content_hash: str, *resource: object) -> str:
+    """Strong ETag for *resource* rendered from content with *content_hash*."""
+    suffix = ".".join(str(part) for part in resource)
+    return f'"{ETAG_REVISION}-{content_hash[:20]}-{suffix}"' if suffix else f'"{ETAG_REVISION}-{content_hash[:20]}"'
+
+
+def act_etag(act: ActRecord, *resource: object) -> str:
+    return make_etag(act.content_hash, *resource)
+
+
+def query_etag(version: str, params: Iterable[Tuple[str, str]]) -> str:
+    """ETag for a query-dependent response over the corpus *version*."""
+    digest = hashlib.sha1("&".join(f"{key}={value}" for key, value in sorted(params)).encode("utf-8"))
+    return make_etag(version, digest.hexdigest()[:16])
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[float] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison function.
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[float] = None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[float] = None) -> Response:
+    headers = validator_headers(etag, last_modified)
+    headers["Vary"] = "Accept-Encoding"
+    return Response(status_code=304, headers=headers)
+
+
+def with_validators(response: Response, etag: str, last_modified: Optional[float] = None) -> Response:
+    response.headers.update(validator_headers(etag, last_modified))
+    return response
+
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    last_modified: Optional[float],
+    build: Callable[[str], Union[Response, BaseModel]],
+) -> Response:
+    """Answer 304 if the client's copy is current, otherwise *build* the response.
+
+    *build* receives the negotiated content coding so pre-compressed bodies
+    can be chosen. The ETag carries the coding the bytes are finally sent
+    with, whether the response comes back pre-compressed or GZipMiddleware
+    will compress it, since strong validators must differ between codings;
+    only identity bodies keep the plain ETag.
+    """
+    accept_encoding = request.headers.get("accept-encoding", "")
+    encoding = negotiate_encoding(accept_encoding, AVAILABLE_ENCODINGS)
+    # The body may end up pre-compressed, gzipped by the middleware or sent as
+    # is, so accept the validator of any of them.
+    codings = {encoding, "gzip" if "gzip" in accept_encoding else "identity"} - {"identity"}
+    candidates = [coded_etag(etag, coding) for coding in sorted(codings)] + [etag]
+    for candidate in candidates:
+        if is_not_modified(request, candidate, last_modified):
+            return not_modified(candidate, last_modified)
+    response = build(encoding)
+    if isinstance(response, BaseModel):
+        response = Response(content=response.model_dump_json(), media_type="application/json")
+    sent = response.headers.get("content-encoding", "identity")
+    if sent == "identity" and will_gzip(accept_encoding, response):
+        # GZipMiddleware adds its own Vary header.
+        sent = "gzip"
+    elif sent == "identity" and "vary" not in response.headers:
+        response.headers["Vary"] = "Accept-Encoding"
+    if sent != "identity":
+        etag = coded_etag(etag, sent)
+    return with_validators(response, etag, last_modified)
+
+
+def will_gzip(accept_encoding: str, response: Response) -> bool:
+    """Whether GZipMiddleware will compress *response* (mirrors its checks).
+
+    Streamed bodies are always compressed, since their size is not known up
+    front.
+    """
+    if "content-encoding" in response.headers or "gzip" not in accept_encoding:
+        return False
+    body = getattr(response, "body", None)
+    return body is None or len(body) >= GZIP_MINIMUM_SIZE
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """*etag* for the body sent with Content-Encoding *encoding*."""
+    return f'{etag[:-1]}.{encoding}"'
@@ -1,14 +1,18 @@
 """FastAPI application exposing the Constitution dataset."""
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import AsyncIterator, List, Literal, Optional
+import gzip
+import json
 import os
 
-from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import APIKeyHeader
 
-from .data_loader import ActRegistry, REGISTRY, SectionRecord
+from .data_loader import ActRegistry, REGISTRY
 from .models import (
     ActDetail,
     ActSummary,
@@ -20,9 +24,13 @@ from .models import (
     SearchHit,
     SearchResponse,
     SectionDetail,
-    SectionSummary,
 )
-from .ai_service import legal_ai
+from .corpus_sync import CorpusSync
+from .http_cache import GZIP_MINIMUM_SIZE, act_etag, conditional_response, make_etag, negotiate_encoding, query_etag
+from .response_cache import ResponseCache, to_paginated_sections, to_section_detail
+from .ai_service import ChatStreamError, legal_ai
+from .cache_service import explanation_cache
+from .explanation_bundles import IMPORT_ON_STARTUP, import_bundles
 
 app = FastAPI(
     title="Constitution Acts API",
@@ -38,6 +46,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresses dynamic responses (search, streams, uncached pages); bodies from
+# the response cache are pre-compressed and already carry Content-Encoding.
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
 # API Key Authentication
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
@@ -56,111 +68,241 @@ async def verify_api_key(api_key: str = Depends(api_key_header)):
     return api_key
 
 
+RESPONSES = ResponseCache(REGISTRY)
+SYNC = CorpusSync(REGISTRY)
+SYNC.publish()
+# Trims the AI cache in the background (TTL and size limits come from the
+# environment); only one worker evicts, the others just refresh their indexes.
+explanation_cache.start_eviction()
+# Adds bundled explanations for sections not cached yet; existing rows are untouched.
+if IMPORT_ON_STARTUP:
+    imported = import_bundles(explanation_cache, REGISTRY)
+    if imported:
+        print(f"📦 Warmed AI cache with {imported} pre-generated explanations")
+
+MAX_BULK_SECTIONS = 1000
+
+
 def get_registry() -> ActRegistry:
     return REGISTRY
 
 
+def get_responses() -> ResponseCache:
+    return RESPONSES
+
+
+def get_sync() -> CorpusSync:
+    return SYNC
+
+
 @app.get("/health")
 def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
 
 
 @app.get("/acts", response_model=List[ActSummary])
-def list_acts(registry: ActRegistry = Depends(get_registry)) -> List[ActSummary]:
-    payload: List[ActSummary] = []
-    for act in registry.list_acts():
-        # Skip acts with no sections (like CONST-1950, CRPC-1973, IPC-1860 which have 0 sections)
-        if len(act.sections) == 0:
-            continue
-        payload.append(
-            ActSummary(
-                act_id=act.act_id,
-                title=act.title,
-                section_count=len(act.sections),
-                languages=sorted(act.languages),
-            )
-        )
-    return payload
+def list_acts(
+    request: Request,
+    registry: ActRegistry = Depends(get_registry),
+    responses: ResponseCache = Depends(get_responses),
+) -> Response:
+    # Acts with no sections (like CONST-1950, CRPC-1973, IPC-1860) are left out of the cached listing
+    etag = make_etag(registry.version, "acts")
+    return conditional_response(request, etag, registry.last_modified, responses.acts.to_response)
 
 
 @app.get("/acts/{act_id}", response_model=ActDetail)
-def get_act(act_id: str, registry: ActRegistry = Depends(get_registry)) -> ActDetail:
+def get_act(
+    act_id: str,
+    request: Request,
+    registry: ActRegistry = Depends(get_registry),
+    responses: ResponseCache = Depends(get_responses),
+) -> Response:
     act = registry.get_act(act_id)
     if not act:
         raise HTTPException(status_code=404, detail="Act not found")
-    samples = [
-        _to_section_summary(act.act_id, registry.get_section(act.act_id, number))
-        for number in act.order[:3]
-    ]
-    samples = [s for s in samples if s is not None]
-    return ActDetail(
-        act_id=act.act_id,
-        title=act.title,
-        section_count=len(act.sections),
-        languages=sorted(act.languages),
-        sample_sections=samples,
-    )
+    etag = act_etag(act, "detail")
+    return conditional_response(request, etag, registry.last_modified, responses.act_detail(act).to_response)
 
 
 @app.get("/acts/{act_id}/sections", response_model=PaginatedSections)
 def list_sections(
     act_id: str,
+    request: Request,
     offset: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page; takes precedence over offset"),
     registry: ActRegistry = Depends(get_registry),
-) -> PaginatedSections:
+    responses: ResponseCache = Depends(get_responses),
+) -> Response:
     act = registry.get_act(act_id)
     if not act:
         raise HTTPException(status_code=404, detail="Act not found")
-    slice_numbers = act.order[offset : offset + limit]
-    items = [_to_section_summary(act.act_id, act.sections[num]) for num in slice_numbers]
-    return PaginatedSections(
-        act_id=act.act_id,
-        total=len(act.sections),
-        offset=offset,
-        limit=limit,
-        items=[item for item in items if item is not None],
-    )
+    if cursor is not None:
+        try:
+            offset = act.resolve_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Malformed cursor") from None
+
+    def build(encoding: str) -> Response | PaginatedSections:
+        cached = responses.page(act, offset, limit)
+        return cached.to_response(encoding) if cached else to_paginated_sections(act, offset, limit)
+
+    etag = act_etag(act, "page", offset, limit)
+    return conditional_response(request, etag, registry.last_modified, build)
 
 
 @app.get("/acts/{act_id}/sections/{section_number}", response_model=SectionDetail)
 def get_section(
     act_id: str,
     section_number: str,
+    request: Request,
     registry: ActRegistry = Depends(get_registry),
-) -> SectionDetail:
+    responses: ResponseCache = Depends(get_responses),
+) -> Response:
+    act = registry.get_act(act_id)
     section = registry.get_section(act_id, section_number)
-    if not section:
+    if not act or not section:
         raise HTTPException(status_code=404, detail="Section not found")
-    return _to_section_detail(act_id, section)
+
+    def build(encoding: str) -> Response | SectionDetail:
+        cached = responses.section_detail(act, section)
+        return cached.to_response(encoding) if cached else to_section_detail(act.act_id, section)
+
+    etag = act_etag(act, "section", section.number)
+    return conditional_response(request, etag, registry.last_modified, build)
+
+
+@app.get("/acts/{act_id}/bulk", response_model=List[SectionDetail])
+def bulk_sections(
+    act_id: str,
+    request: Request,
+    sections: Optional[List[str]] = Query(
+        None,
+        description="Section numbers to return (repeat the parameter or comma-separate); omit for the whole act",
+    ),
+    registry: ActRegistry = Depends(get_registry),
+    responses: ResponseCache = Depends(get_responses),
+) -> Response:
+    """Full section details for many sections in one streamed JSON array, for offline sync."""
+    act = registry.get_act(act_id)
+    if not act:
+        raise HTTPException(status_code=404, detail="Act not found")
+    numbers = None
+    if sections:
+        # Repeated numbers would stream the same section twice; keep the first.
+        numbers = list(dict.fromkeys(number.strip() for value in sections for number in value.split(",") if number.strip()))
+    if numbers is not None and len(numbers) > MAX_BULK_SECTIONS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BULK_SECTIONS} sections per request")
+
+    def build(encoding: str) -> StreamingResponse:
+        records = registry.iter_sections(act, numbers)
+        return StreamingResponse(responses.iter_section_details(act, records), media_type="application/json")
+
+    etag = act_etag(act, "bulk") if numbers is None else query_etag(act.content_hash, [("sections", ",".join(numbers))])
+    return conditional_response(request, etag, registry.last_modified, build)
+
+
+@app.get("/acts/{act_id}/export", response_class=StreamingResponse)
+def export_act(
+    act_id: str,
+    request: Request,
+    after: Optional[str] = Query(None, description="Resume after this section number (the last one received)"),
+    registry: ActRegistry = Depends(get_registry),
+    responses: ResponseCache = Depends(get_responses),
+) -> Response:
+    """Stream every section of an act, with Hindi text, as NDJSON (one SectionDetail per line)."""
+    act = registry.get_act(act_id)
+    if not act:
+        raise HTTPException(status_code=404, detail="Act not found")
+    start = 0
+    if after is not None:
+        ordinal = registry.section_ordinal(act, after)
+        if ordinal is None:
+            raise HTTPException(status_code=422, detail="Unknown section cursor")
+        start = ordinal + 1
+
+    def build(encoding: str) -> StreamingResponse:
+        lines = responses.iter_section_lines(act, act.iter_sections_from(start))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    etag = act_etag(act, "export", start)
+    return conditional_response(request, etag, registry.last_modified, build)
+
+
+@app.get("/sync/manifest")
+def corpus_manifest(
+    request: Request,
+    registry: ActRegistry = Depends(get_registry),
+    sync: CorpusSync = Depends(get_sync),
+) -> Response:
+    """Current corpus version with a content hash for every section."""
+    etag = make_etag(sync.version, "manifest")
+    return conditional_response(request, etag, registry.last_modified, sync.manifest_response.to_response)
+
+
+@app.get("/sync/delta")
+def corpus_delta(
+    request: Request,
+    since: Optional[str] = Query(None, description="Corpus version the client currently holds"),
+    registry: ActRegistry = Depends(get_registry),
+    sync: CorpusSync = Depends(get_sync),
+) -> Response:
+    """Sections changed, added or removed since *since* (everything if the version is unknown)."""
+    accepts_gzip = negotiate_encoding(request.headers.get("accept-encoding", ""), ("gzip",)) == "gzip"
+
+    def build(encoding: str) -> Response:
+        package = sync.delta(since)
+        if accepts_gzip:
+            headers = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+            return Response(content=package, media_type="application/json", headers=headers)
+        return Response(content=gzip.decompress(package), media_type="application/json", headers={"Vary": "Accept-Encoding"})
+
+    etag = make_etag(sync.version, "delta", sync.known_version(since) or "full")
+    return conditional_response(request, etag, registry.last_modified, build)
 
 
 @app.get("/search", response_model=SearchResponse)
 def search_sections(
-    q: str = Query(..., min_length=2, description="Full-text query string"),
+    request: Request,
+    q: str = Query(
+        ...,
+        min_length=2,
+        description='Full-text query: terms are AND-ed, use OR for alternatives, "quotes" for phrases and term* for prefixes',
+    ),
     act_id: Optional[str] = Query(None, description="Limit search to a specific act"),
     limit: int = Query(20, ge=1, le=100),
+    sort: Literal["relevance", "order"] = Query("relevance", description="Rank by BM25 relevance or section order"),
+    lang: Literal["en", "hi"] = Query("en", description="Search the English or the Hindi text"),
     registry: ActRegistry = Depends(get_registry),
-) -> SearchResponse:
-    results = registry.search(q, act_id=act_id, limit=limit)
-    hits: List[SearchHit] = []
-    for act, record in results:
-        snippet = record.preview(200)
-        hits.append(
-            SearchHit(
-                act_id=act.act_id,
-                section_number=record.number,
-                heading=record.heading,
-                snippet=snippet,
+) -> Response:
+    def build(encoding: str) -> SearchResponse:
+        results = registry.search(q, act_id=act_id, limit=limit, sort=sort, lang=lang)
+        hits: List[SearchHit] = []
+        for hit in results.hits:
+            hits.append(
+                SearchHit(
+                    act_id=hit.act.act_id,
+                    section_number=hit.record.number,
+                    heading=hit.record.heading,
+                    snippet=hit.snippet,
+                    score=round(hit.score, 4) if sort == "relevance" else None,
+                    highlights=hit.highlights,
+                    heading_highlights=hit.heading_highlights,
+                )
             )
-        )
-    return SearchResponse(query=q, total=len(results), items=hits)
+        return SearchResponse(query=q, total=results.total, items=hits)
+
+    etag = query_etag(registry.version, request.query_params.multi_items())
+    return conditional_response(request, etag, registry.last_modified, build)
 
 
 @app.post("/api/explain", response_model=ExplainResponse)
-def explain_section(request: ExplainRequest, api_key: str = Depends(verify_api_key)) -> ExplainResponse:
+async def explain_section(request: ExplainRequest, api_key: str = Depends(verify_api_key)) -> ExplainResponse:
     """Convert complex legal text to simple language using AI."""
-    result = legal_ai.explain_section(
+    # Async so slow Gemini calls wait on the event loop rather than tying up
+    # the threadpool that serves the read endpoints.
+    result = await legal_ai.explain_section_async(
         section_text=request.section_text,
         language=request.language,
         include_examples=request.include_examples
@@ -172,40 +314,50 @@ def explain_section(request: ExplainRequest, api_key: str = Depends(verify_api_k
 
 
 @app.post("/api/chat", response_model=ChatResponse)
-def chat_query(request: ChatRequest, api_key: str = Depends(verify_api_key)) -> ChatResponse:
+async def chat_query(request: ChatRequest, api_key: str = Depends(verify_api_key)) -> ChatResponse:
     """Answer user's legal questions using AI."""
-    answer = legal_ai.chat_query(
+    answer = await legal_ai.chat_query_async(
         user_question=request.question,
         language=request.language,
         context=request.context
     )
-    
-    disclaimer = (
-        "यह केवल शैक्षिक जानकारी है, कानूनी सलाह नहीं। गंभीर मामलों में वकील से परामर्श करें।"
-        if request.language == "hi"
-        else "This is educational information only, not legal advice. Consult a lawyer for serious matters."
-    )
-    
-    return ChatResponse(answer=answer, disclaimer=disclaimer)
+    return ChatResponse(answer=answer, disclaimer=chat_disclaimer(request.language))
 
 
-# ---------------------------------------------------------------------------
-
-def _to_section_summary(act_id: str, record: Optional[SectionRecord]) -> Optional[SectionSummary]:
-    if not record:
-        return None
-    return SectionSummary(
-        section_number=record.number,
-        heading=record.heading,
-        preview=record.preview(),
-    )
+@app.post("/api/chat/stream", response_class=StreamingResponse)
+async def chat_query_stream(request: ChatRequest, api_key: str = Depends(verify_api_key)) -> StreamingResponse:
+    """Answer user's legal questions as server-sent events.
 
+    Each ``message`` event carries ``{"delta": ...}`` with the next piece of the
+    answer; a final ``done`` event carries ``{"disclaimer": ...}``. If the AI
+    service is unavailable or generation fails, an ``error`` event carrying
+    ``{"error": ...}`` is sent instead of ``done`` and any answer so far must be
+    treated as incomplete.
+    """
 
-def _to_section_detail(act_id: str, record: SectionRecord) -> SectionDetail:
-    return SectionDetail(
-        act_id=act_id,
-        section_number=record.number,
-        heading=record.heading,
-        content=record.text_en,
-        content_hi=record.text_hi,
+    async def events() -> AsyncIterator[str]:
+        pieces = legal_ai.chat_query_stream(
+            user_question=request.question,
+            language=request.language,
+            context=request.context
+        )
+        try:
+            async for piece in pieces:
+                yield f"data: {json.dumps({'delta': piece}, ensure_ascii=False)}\n\n"
+        except ChatStreamError as exc:
+            yield f"event: error\ndata: {json.dumps({'error': str(exc)}, ensure_ascii=False)}\n\n"
+            return
+        done = json.dumps({"disclaimer": chat_disclaimer(request.language)}, ensure_ascii=False)
+        yield f"event: done\ndata: {done}\n\n"
+
+    # Content-Encoding: identity keeps GZipMiddleware from buffering the events.
+    headers = {"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+def chat_disclaimer(language: str) -> str:
+    return (
+        "यह केवल शैक्षिक जानकारी है, कानूनी सलाह नहीं। गंभीर मामलों में वकील से परामर्श करें।"
+        if language == "hi"
+        else "This is educational information only, not legal advice. Consult a lawyer for serious matters."
     )
@@ -1,7 +1,7 @@
 """Pydantic schemas for the Constitution data API."""
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -40,18 +40,31 @@ class PaginatedSections(BaseModel):
     offset: int
     limit: int
     items: List[SectionSummary]
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Opaque cursor for the following page (pass as ?cursor=); null on the last page",
+    )
 
 
 class SearchHit(BaseModel):
     act_id: str
     section_number: str
     heading: str
-    snippet: str
+    snippet: str = Field(..., description="Excerpt centred on the matched terms")
+    score: Optional[float] = Field(None, description="BM25 relevance score when sorted by relevance")
+    highlights: List[Tuple[int, int]] = Field(
+        default_factory=list,
+        description="[start, end) character ranges of matched terms within the snippet",
+    )
+    heading_highlights: List[Tuple[int, int]] = Field(
+        default_factory=list,
+        description="[start, end) character ranges of matched terms within the heading",
+    )
 
 
 class SearchResponse(BaseModel):
     query: str
-    total: int
+    total: int = Field(..., description="Number of matching sections, including those beyond the limit")
     items: List[SearchHit]
 
 
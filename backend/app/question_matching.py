@@ -0,0 +1,217 @@
+"""Canonical forms and near-duplicate lookup for chat questions.
+
+Questions are reduced to the acts and section numbers they mention plus
+their remaining content words in order, so "What is section 103 BNS?" and
+"what is section 103 of BNS" share one canonical form while "can the police
+arrest a judge" and "can a judge arrest the police" do not. Paraphrases that
+still differ are matched by TF-IDF cosine similarity over those content words
+and adjacent word pairs, but only against questions about exactly the same
+acts and sections.
+"""
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .search_index import tokenize_hindi
+
+# Minimum cosine similarity for a cached question to answer a new one.
+SIMILARITY_THRESHOLD = float(os.getenv("AI_CHAT_SIMILARITY", "0.8"))
+
+# Words introducing a section number ("section 103", "s. 103", "धारा 103").
+SECTION_WORDS = {"section", "sections", "sec", "s", "धारा", "धाराओं"}
+SECTION_NUMBER_PATTERN = re.compile(r"^\d+[a-z]?$")
+# Joiners in lists of section numbers ("sections 103, 104 and 105").
+SECTION_JOINERS = {"and", "or", "और", "या"}
+
+# Spellings of each act, matched longest first after tokenization.
+ACT_ALIASES = {
+    "BNS-2023": ["bns", "bharatiya nyaya sanhita", "बीएनएस", "भारतीय न्याय संहिता"],
+    "BNSS-2023": ["bnss", "bharatiya nagarik suraksha sanhita", "बीएनएसएस", "भारतीय नागरिक सुरक्षा संहिता"],
+    "BSA-2023": ["bsa", "bharatiya sakshya adhiniyam", "बीएसए", "भारतीय साक्ष्य अधिनियम"],
+    "IPC-1860": ["ipc", "indian penal code", "आईपीसी", "भारतीय दंड संहिता"],
+    "CRPC-1973": ["crpc", "code of criminal procedure", "सीआरपीसी", "दंड प्रक्रिया संहिता"],
+}
+
+STOPWORDS = {
+    # English question scaffolding
+    "a", "about", "an", "and", "any", "are", "as", "at", "be", "by", "can", "could", "define", "describe",
+    "do", "does", "explain", "for", "from", "give", "how", "i", "in", "is", "it", "its", "know", "me", "mean",
+    "meaning", "means", "my", "of", "on", "please", "provision", "provisions", "say", "says", "tell", "that",
+    "the", "this", "to", "under", "want", "what", "whats", "which", "with", "you",
+    "s", "u",  # left over from "what's" and "u/s" when not followed by a number
+    "act", "code", "law", "sanhita",
+    # Hindi question scaffolding
+    "क्या", "है", "हैं", "का", "की", "के", "में", "को", "से", "और", "पर", "यह", "कौन", "कौनसी", "कैसे", "बताइए",
+    "बताइये", "बताओ", "बताएं", "समझाइए", "समझाओ", "कृपया", "मुझे", "मतलब", "अर्थ", "कानून", "अंतर्गत", "तहत",
+}
+
+
+def _fold_all(words) -> Set[str]:
+    return {term for word in words for term in tokenize_hindi(word)}
+
+
+_SECTION_WORDS = _fold_all(SECTION_WORDS)
+_SECTION_JOINERS = _fold_all(SECTION_JOINERS)
+_STOPWORDS = _fold_all(STOPWORDS)
+_ACT_PHRASES = sorted(
+    ((tuple(tokenize_hindi(alias)), act_id) for act_id, aliases in ACT_ALIASES.items() for alias in aliases),
+    key=lambda item: -len(item[0]),
+)
+
+
+@dataclass(frozen=True)
+class CanonicalQuestion:
+    acts: Tuple[str, ...]
+    sections: Tuple[str, ...]
+    terms: Tuple[str, ...]
+
+    @property
+    def key(self) -> str:
+        """Stable text form; equal keys mean the questions are treated as the same."""
+        return f"{','.join(self.acts)}|{','.join(self.sections)}|{' '.join(self.terms)}"
+
+    @classmethod
+    def from_key(cls, key: str) -> "CanonicalQuestion":
+        acts, sections, terms = key.split("|", 2)
+        return cls(
+            acts=tuple(filter(None, acts.split(","))),
+            sections=tuple(filter(None, sections.split(","))),
+            terms=tuple(terms.split()),
+        )
+
+
+def canonicalize_question(question: str) -> CanonicalQuestion:
+    """Fold case, punctuation, spacing and spelling variants out of *question*."""
+    tokens = tokenize_hindi(question)
+    acts: Set[str] = set()
+    sections: Set[str] = set()
+    terms: List[str] = []
+
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        for phrase, act_id in _ACT_PHRASES:
+            if tuple(tokens[index : index + len(phrase)]) == phrase:
+                acts.add(act_id)
+                index += len(phrase)
+                break
+        else:
+            following = tokens[index + 1] if index + 1 < len(tokens) else ""
+            if token in _SECTION_WORDS and SECTION_NUMBER_PATTERN.match(following):
+                sections.add(following)
+                index += 2
+                while index < len(tokens):
+                    step = 1 if tokens[index] in _SECTION_JOINERS else 0
+                    if index + step >= len(tokens) or not SECTION_NUMBER_PATTERN.match(tokens[index + step]):
+                        break
+                    sections.add(tokens[index + step])
+                    index += step + 1
+                continue
+            if token not in _STOPWORDS:
+                terms.append(token)
+            index += 1
+
+    return CanonicalQuestion(
+        acts=tuple(sorted(acts)),
+        sections=tuple(sorted(sections, key=_section_sort_key)),
+        terms=tuple(terms),
+    )
+
+
+def _section_sort_key(number: str) -> Tuple[int, str]:
+    digits = number.rstrip("abcdefghijklmnopqrstuvwxyz")
+    return int(digits), number[len(digits):]
+
+
+def _features(question: CanonicalQuestion) -> FrozenSet[str]:
+    """Content words plus adjacent word pairs, so word order counts towards similarity."""
+    pairs = (f"{first} {second}" for first, second in zip(question.terms, question.terms[1:]))
+    return frozenset(question.terms).union(pairs)
+
+
+# ---------------------------------------------------------------------------
+
+
+class QuestionIndex:
+    """TF-IDF cosine lookup over canonical questions already in the cache.
+
+    Questions are bucketed by language, acts and sections so a match can only
+    come from a question about exactly the same provisions.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD) -> None:
+        self.threshold = threshold
+        self._terms: Dict[str, FrozenSet[str]] = {}
+        self._buckets: Dict[str, Tuple[str, ...]] = {}
+        self._postings: Dict[Tuple[Tuple[str, ...], str], Set[str]] = defaultdict(set)
+        self._document_frequency: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def keys(self) -> Set[str]:
+        """Cache keys of every indexed question (a copy)."""
+        with self._lock:
+            return set(self._terms)
+
+    def add(self, cache_key: str, question: CanonicalQuestion, language: str) -> None:
+        terms = _features(question)
+        bucket = (language,) + question.acts + ("|",) + question.sections
+        with self._lock:
+            if cache_key in self._terms:
+                return
+            self._terms[cache_key] = terms
+            self._buckets[cache_key] = bucket
+            for term in terms:
+                self._document_frequency[term] += 1
+                self._postings[(bucket, term)].add(cache_key)
+
+    def remove(self, cache_key: str) -> None:
+        with self._lock:
+            terms = self._terms.pop(cache_key, None)
+            if terms is None:
+                return
+            bucket = self._buckets.pop(cache_key)
+            for term in terms:
+                self._document_frequency[term] -= 1
+                postings = self._postings[(bucket, term)]
+                postings.discard(cache_key)
+                if not postings:
+                    del self._postings[(bucket, term)]
+
+    def find(self, question: CanonicalQuestion, language: str) -> Optional[str]:
+        """Cache key of the most similar indexed question at or above the threshold."""
+        terms = _features(question)
+        if not terms:
+            return None
+        bucket = (language,) + question.acts + ("|",) + question.sections
+
+        with self._lock:
+            total = len(self._terms)
+            candidates: Set[str] = set()
+            for term in terms:
+                candidates |= self._postings.get((bucket, term), set())
+            if not candidates:
+                return None
+
+            weights = {term: self._idf(term, total) for term in terms}
+            query_norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            best_key, best_score = None, self.threshold
+            for cache_key in candidates:
+                other = self._terms[cache_key]
+                shared = sum(weights[term] ** 2 for term in terms & other)
+                other_norm = math.sqrt(sum(self._idf(term, total) ** 2 for term in other))
+                score = shared / (query_norm * other_norm)
+                if score >= best_score:
+                    best_key, best_score = cache_key, score
+        return best_key
+
+    def _idf(self, term: str, total: int) -> float:
+        return math.log((total + 1) / (self._document_frequency.get(term, 0) + 1)) + 1.0
@@ -0,0 +1,168 @@
+"""Pre-serialized JSON bodies for the read-only act endpoints.
+
+The registry never changes after it is loaded, so the responses for act
+listings, act details, section details and the default-sized section pages
+are rendered (and compressed) once at startup and served as raw bytes.
+"""
+from __future__ import annotations
+
+import gzip
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from .data_loader import ActRecord, ActRegistry, SectionRecord
+from .models import ActDetail, ActSummary, PaginatedSections, SectionDetail, SectionSummary
+
+try:  # Optional: brotli gives ~15% smaller bodies than gzip when installed.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+DEFAULT_PAGE_SIZE = 20
+ACT_SAMPLE_SIZE = 3
+# Bodies smaller than this are not worth compressing.
+MIN_COMPRESS_SIZE = 500
+GZIP_LEVEL = 9
+# Qualities above 7 cost ~10x the startup time for well under 1% smaller bodies.
+BROTLI_QUALITY = 7
+
+AVAILABLE_ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    body: bytes
+    media_type: str = "application/json"
+    gzip_body: Optional[bytes] = None
+    br_body: Optional[bytes] = None
+
+    def to_response(self, encoding: str = "identity") -> Response:
+        body = self.br_body if encoding == "br" else self.gzip_body if encoding == "gzip" else None
+        if body is None:
+            return Response(content=self.body, media_type=self.media_type, headers={"Vary": "Accept-Encoding"})
+        headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+    def compress(self) -> "CachedResponse":
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            self.gzip_body = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.br_body = brotli.compress(self.body, quality=BROTLI_QUALITY)
+        return self
+
+
+class ResponseCache:
+    """Serialized responses for everything the registry can answer statically.
+
+    Section details are skipped when the registry shares its texts through the
+    snapshot mapping, since caching them would copy the corpus into every
+    worker again.
+    """
+
+    def __init__(self, registry: ActRegistry, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+        self.page_size = page_size
+        self.acts = _serialize_list([to_act_summary(act) for act in registry.list_acts() if act.section_count])
+        self.act_details: Dict[str, CachedResponse] = {}
+        self.pages: Dict[Tuple[str, int], CachedResponse] = {}
+        self.section_details: Dict[Tuple[str, str], CachedResponse] = {}
+
+        for act in registry.list_acts():
+            self.act_details[act.act_id] = _serialize(to_act_detail(act))
+            for offset in range(0, act.section_count, page_size):
+                self.pages[(act.act_id, offset)] = _serialize(to_paginated_sections(act, offset, page_size))
+            if registry.shared_text:
+                continue
+            for record in act.iter_sections():
+                self.section_details[(act.act_id, record.number)] = _serialize(to_section_detail(act.act_id, record))
+
+    def act_detail(self, act: ActRecord) -> Optional[CachedResponse]:
+        return self.act_details.get(act.act_id)
+
+    def page(self, act: ActRecord, offset: int, limit: int) -> Optional[CachedResponse]:
+        if limit != self.page_size:
+            return None
+        return self.pages.get((act.act_id, offset))
+
+    def section_detail(self, act: ActRecord, record: SectionRecord) -> Optional[CachedResponse]:
+        return self.section_details.get((act.act_id, record.number))
+
+    def iter_section_details(self, act: ActRecord, records: Iterable[SectionRecord]) -> Iterator[bytes]:
+        """Yield a JSON array of section details one element at a time."""
+        yield b"["
+        for index, record in enumerate(records):
+            if index:
+                yield b","
+            yield self._section_body(act, record)
+        yield b"]"
+
+    def iter_section_lines(self, act: ActRecord, records: Iterable[SectionRecord]) -> Iterator[bytes]:
+        """Yield section details as newline-delimited JSON."""
+        for record in records:
+            yield self._section_body(act, record) + b"\n"
+
+    def _section_body(self, act: ActRecord, record: SectionRecord) -> bytes:
+        cached = self.section_detail(act, record)
+        return cached.body if cached else to_section_detail(act.act_id, record).model_dump_json().encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+
+
+def to_act_summary(act: ActRecord) -> ActSummary:
+    return ActSummary(
+        act_id=act.act_id,
+        title=act.title,
+        section_count=act.section_count,
+        languages=sorted(act.languages),
+    )
+
+
+def to_act_detail(act: ActRecord) -> ActDetail:
+    return ActDetail(
+        act_id=act.act_id,
+        title=act.title,
+        section_count=act.section_count,
+        languages=sorted(act.languages),
+        sample_sections=[to_section_summary(record) for record in act.slice_sections(0, ACT_SAMPLE_SIZE)],
+    )
+
+
+def to_paginated_sections(act: ActRecord, offset: int, limit: int) -> PaginatedSections:
+    return PaginatedSections(
+        act_id=act.act_id,
+        total=act.section_count,
+        offset=offset,
+        limit=limit,
+        items=[to_section_summary(record) for record in act.slice_sections(offset, limit)],
+        next_cursor=act.cursor_at(offset + limit),
+    )
+
+
+def to_section_summary(record: SectionRecord) -> SectionSummary:
+    return SectionSummary(
+        section_number=record.number,
+        heading=record.heading,
+        preview=record.preview(),
+    )
+
+
+def to_section_detail(act_id: str, record: SectionRecord) -> SectionDetail:
+    return SectionDetail(
+        act_id=act_id,
+        section_number=record.number,
+        heading=record.heading,
+        content=record.text_en,
+        content_hi=record.text_hi,
+    )
+
+
+def _serialize(model: BaseModel) -> CachedResponse:
+    return CachedResponse(body=model.model_dump_json().encode("utf-8")).compress()
+
+
+def _serialize_list(models: List[BaseModel]) -> CachedResponse:
+    body = b"[" + b",".join(model.model_dump_json().encode("utf-8") for model in models) + b"]"
+    return CachedResponse(body=body).compress()
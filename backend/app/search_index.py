@@ -0,0 +1,492 @@
+"""Positional inverted index used to answer full-text queries over sections."""
+from __future__ import annotations
+
+import heapq
+import importlib.util
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+HINDI_NORMALIZER_SCRIPT = ROOT / "scripts" / "normalize_hindi_sections.py"
+
+# BM25 parameters; heading matches count HEADING_BOOST times a body match.
+BM25_K1 = 1.2
+BM25_B = 0.75
+HEADING_BOOST = 3.0
+
+SORT_RELEVANCE = "relevance"
+SORT_ORDER = "order"
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+OR_PATTERN = re.compile(r"\s+(?:OR|\|)\s+|\s*\|\s*")
+
+
+# (term, start, end) with character offsets into the analyzed text
+Token = Tuple[str, int, int]
+Analyzer = Callable[[str], List[Token]]
+
+
+def analyze(text: str) -> List[Token]:
+    """Split *text* into lower-cased word tokens with their offsets."""
+    return [(match.group().lower(), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+
+
+def tokenize(text: str) -> List[str]:
+    """Split *text* into lower-cased word tokens."""
+    return [term for term, _, _ in analyze(text)]
+
+
+# ---------------------------------------------------------------------------
+# Hindi analysis
+
+# Combining vowel signs are not matched by \w, so Devanagari words need an
+# explicit character class (the dandas U+0964/U+0965 stay separators).
+HINDI_TOKEN_PATTERN = re.compile(r"[\w\u0900-\u0963\u0966-\u097F\u200c\u200d]+", re.UNICODE)
+
+# Applied after NFD decomposition: drop nukta and joiners, fold chandrabindu
+# into anusvara and long vowels/matras into their short forms so that common
+# spelling variants (e.g. "नीति"/"निति", "पुलिस"/"पुलीस") share one term.
+HINDI_FOLDING = str.maketrans({
+    "\u093c": None,  # nukta
+    "\u200c": None,  # zero width non-joiner
+    "\u200d": None,  # zero width joiner
+    "\u0901": "\u0902",  # chandrabindu -> anusvara
+    "\u0940": "\u093f",  # ी -> ि
+    "\u0942": "\u0941",  # ू -> ु
+    "\u0948": "\u0947",  # ै -> े
+    "\u094c": "\u094b",  # ौ -> ो
+    "\u0908": "\u0907",  # ई -> इ
+    "\u090a": "\u0909",  # ऊ -> उ
+    "\u0910": "\u090f",  # ऐ -> ए
+    "\u0914": "\u0913",  # औ -> ओ
+})
+
+
+def _load_devanagari_digits() -> Dict[int, int]:
+    """Reuse the digit table maintained alongside the Hindi OCR normalizer."""
+    spec = importlib.util.spec_from_file_location("normalize_hindi_sections", HINDI_NORMALIZER_SCRIPT)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load {HINDI_NORMALIZER_SCRIPT}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.DEVANAGARI_DIGITS
+
+
+DEVANAGARI_DIGITS = _load_devanagari_digits()
+
+
+def normalize_hindi(text: str) -> str:
+    """Fold *text* to the canonical form used for Hindi index terms."""
+    text = unicodedata.normalize("NFD", text).translate(HINDI_FOLDING)
+    text = text.translate(DEVANAGARI_DIGITS)
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def analyze_hindi(text: str) -> List[Token]:
+    """Split Devanagari (or mixed) *text* into normalized tokens with offsets.
+
+    Tokens are found in the original text and folded one by one, so the
+    offsets point into *text* rather than into its normalized form.
+    """
+    tokens = []
+    for match in HINDI_TOKEN_PATTERN.finditer(text):
+        term = normalize_hindi(match.group())
+        if term:
+            tokens.append((term, match.start(), match.end()))
+    return tokens
+
+
+def tokenize_hindi(text: str) -> List[str]:
+    """Split Devanagari (or mixed) *text* into normalized word tokens."""
+    return [term for term, _, _ in analyze_hindi(text)]
+
+
+# ---------------------------------------------------------------------------
+# Query parsing
+
+
+@dataclass
+class Clause:
+    """A conjunction of single terms, prefix terms and phrases."""
+
+    terms: List[str] = field(default_factory=list)
+    prefixes: List[str] = field(default_factory=list)
+    phrases: List[List[str]] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.terms or self.prefixes or self.phrases)
+
+
+def parse_query(query: str, analyzer: Analyzer = analyze) -> List[Clause]:
+    """Parse *query* into OR-ed clauses of AND-ed terms.
+
+    Supported syntax: whitespace separated terms are AND-ed, ``OR`` (or ``|``)
+    separates alternatives, ``"double quotes"`` mark phrases and a trailing
+    ``*`` turns a term into a prefix match.
+    """
+    clauses: List[Clause] = []
+    for part in OR_PATTERN.split(query.strip()):
+        clause = Clause()
+        for phrase in PHRASE_PATTERN.findall(part):
+            tokens = [term for term, _, _ in analyzer(phrase)]
+            if len(tokens) > 1:
+                clause.phrases.append(tokens)
+            elif tokens:
+                clause.terms.append(tokens[0])
+        remainder = PHRASE_PATTERN.sub(" ", part)
+        for raw in remainder.split():
+            is_prefix = raw.endswith("*")
+            tokens = [term for term, _, _ in analyzer(raw)]
+            if not tokens:
+                continue
+            if is_prefix and len(tokens) == 1:
+                clause.prefixes.append(tokens[0])
+            elif len(tokens) > 1:
+                # Punctuated input such as "section-103" behaves like a phrase.
+                clause.phrases.append(tokens)
+            else:
+                clause.terms.append(tokens[0])
+        if not clause.is_empty():
+            clauses.append(clause)
+    return clauses
+
+
+@dataclass
+class SearchMatch:
+    doc_id: int
+    score: float = 0.0
+    # Query terms (after prefix expansion) that occur in the document.
+    terms: List[str] = field(default_factory=list)
+
+
+# (start, end) character range
+Span = Tuple[int, int]
+
+
+def build_snippet(text: str, spans: List[Span], max_chars: int) -> Optional[Tuple[str, List[Span]]]:
+    """Cut a window of *text* around the densest cluster of *spans*.
+
+    Returns the snippet (newlines folded to spaces, "…" marking cut ends) and
+    the highlight ranges re-based onto it, or ``None`` when there are no spans.
+    """
+    if not spans:
+        return None
+    spans = sorted(spans)
+    budget = max(max_chars - 2, 1)  # leave room for the ellipses
+
+    best_first, best_last, best_count = 0, 0, 0
+    last = 0
+    for first in range(len(spans)):
+        last = max(last, first)
+        while last + 1 < len(spans) and spans[last + 1][1] - spans[first][0] <= budget:
+            last += 1
+        if last - first + 1 > best_count:
+            best_first, best_last, best_count = first, last, last - first + 1
+
+    cluster_start, cluster_end = spans[best_first][0], spans[best_last][1]
+    slack = max(budget - (cluster_end - cluster_start), 0)
+    start = max(0, cluster_start - slack // 2)
+    end = min(len(text), start + budget)
+    start = max(0, end - budget)
+
+    # Avoid cutting words in half where that keeps the cluster intact.
+    if start > 0:
+        space = text.find(" ", start, cluster_start)
+        if space != -1:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", max(cluster_end, start), end)
+        if space != -1:
+            end = space
+
+    window = text[start:end].replace("\n", " ")
+    lead = len(window) - len(window.lstrip())
+    window = window.strip()
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    shift = start + lead - len(prefix)
+    highlights = [
+        (span_start - shift, span_end - shift)
+        for span_start, span_end in spans
+        if span_start >= start + lead and span_end <= start + lead + len(window)
+    ]
+    return prefix + window + suffix, highlights
+
+
+# ---------------------------------------------------------------------------
+# Index
+
+
+Postings = Dict[int, array]
+
+
+class PackedPostings(Mapping[str, Postings]):
+    """Read-only postings stored in flat arrays and decoded per term on demand.
+
+    This is how an index restored from a snapshot keeps its postings: loading
+    it only copies a handful of arrays, and a query pays for decoding just the
+    posting lists it touches.
+    """
+
+    def __init__(self, terms: List[str], term_ptr: array, doc_ids: array, pos_ptr: array, positions: array) -> None:
+        self.terms = terms
+        self._slots = {term: slot for slot, term in enumerate(terms)}
+        self._term_ptr = term_ptr
+        self._doc_ids = doc_ids
+        self._pos_ptr = pos_ptr
+        self._positions = positions
+        self._decoded: Dict[str, Postings] = {}
+
+    @classmethod
+    def pack(cls, postings: Mapping[str, Postings]) -> "PackedPostings":
+        terms = sorted(postings)
+        term_ptr, doc_ids, pos_ptr, positions = array("I", [0]), array("I"), array("I", [0]), array("I")
+        for term in terms:
+            for doc_id, term_positions in postings[term].items():
+                doc_ids.append(doc_id)
+                positions.extend(term_positions)
+                pos_ptr.append(len(positions))
+            term_ptr.append(len(doc_ids))
+        return cls(terms, term_ptr, doc_ids, pos_ptr, positions)
+
+    def __getitem__(self, term: str) -> Postings:
+        decoded = self._decoded.get(term)
+        if decoded is None:
+            slot = self._slots[term]
+            decoded = {}
+            for entry in range(self._term_ptr[slot], self._term_ptr[slot + 1]):
+                decoded[self._doc_ids[entry]] = self._positions[self._pos_ptr[entry] : self._pos_ptr[entry + 1]]
+            self._decoded[term] = decoded
+        return decoded
+
+    def __contains__(self, term: object) -> bool:
+        return term in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def document_frequency(self, term: str) -> int:
+        slot = self._slots[term]
+        return self._term_ptr[slot + 1] - self._term_ptr[slot]
+
+
+class InvertedIndex:
+    """Maps each term to the documents (and token positions) containing it.
+
+    Documents are identified by a dense integer id assigned in insertion
+    order, so posting lists are naturally sorted and documents belonging to
+    the same act occupy a contiguous id range. The *analyzer* turns both
+    documents and queries into terms.
+    """
+
+    def __init__(self, analyzer: Analyzer = analyze) -> None:
+        self.analyzer = analyzer
+        self.postings: Mapping[str, Postings] = {}
+        self.doc_keys: List[Tuple[str, str]] = []
+        self.act_ranges: Dict[str, Tuple[int, int]] = {}
+        self.heading_lengths = array("I")
+        self.body_lengths = array("I")
+        # Per document, (start, end) character offsets of every position,
+        # flattened; heading positions point into the heading, body ones into
+        # the body.
+        self.token_offsets: List[array] = []
+        # Statistics below are filled in by finalize() once all documents are added.
+        self.doc_lengths: List[float] = []
+        self.avg_doc_length = 0.0
+        self.idf: Dict[str, float] = {}
+        self._sorted_terms: Optional[List[str]] = None
+
+    # ------------------------------------------------------------------
+    def add_document(self, act_id: str, section_number: str, heading: str, body: str) -> int:
+        postings = self.postings
+        if not isinstance(postings, dict):
+            raise TypeError("Indexes restored from a snapshot are read-only")
+        doc_id = len(self.doc_keys)
+        self.doc_keys.append((act_id, section_number))
+        start, _ = self.act_ranges.get(act_id, (doc_id, doc_id))
+        self.act_ranges[act_id] = (start, doc_id + 1)
+
+        heading_tokens = self.analyzer(heading)
+        body_tokens = self.analyzer(body)
+        self.heading_lengths.append(len(heading_tokens))
+        self.body_lengths.append(len(body_tokens))
+        # Leave a one-position gap so phrases never span heading and body.
+        body_offset = len(heading_tokens) + 1
+        positions: Dict[str, array] = {}
+        offsets = array("I")
+        for position, (term, start, end) in enumerate(heading_tokens):
+            positions.setdefault(term, array("I")).append(position)
+            offsets.extend((start, end))
+        offsets.extend((0, 0))
+        for position, (term, start, end) in enumerate(body_tokens, start=body_offset):
+            positions.setdefault(term, array("I")).append(position)
+            offsets.extend((start, end))
+        self.token_offsets.append(offsets)
+
+        for term, term_positions in positions.items():
+            postings.setdefault(term, {})[doc_id] = term_positions
+        self._sorted_terms = None
+        return doc_id
+
+    def finalize(self) -> None:
+        """Precompute document-length and IDF statistics used for ranking."""
+        self.doc_lengths = [
+            HEADING_BOOST * heading + body for heading, body in zip(self.heading_lengths, self.body_lengths)
+        ]
+        count = len(self.doc_lengths)
+        self.avg_doc_length = (sum(self.doc_lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    @property
+    def sorted_terms(self) -> List[str]:
+        if self._sorted_terms is None:
+            if isinstance(self.postings, PackedPostings):
+                self._sorted_terms = self.postings.terms
+            else:
+                self._sorted_terms = sorted(self.postings)
+        return self._sorted_terms
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        postings = self.postings if isinstance(self.postings, PackedPostings) else PackedPostings.pack(self.postings)
+        state["postings"] = (postings.terms, postings._term_ptr, postings._doc_ids, postings._pos_ptr, postings._positions)
+        state["_sorted_terms"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state["postings"] = PackedPostings(*state["postings"])
+        self.__dict__.update(state)
+
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        query: str,
+        act_id: Optional[str] = None,
+        sort: str = SORT_RELEVANCE,
+        limit: Optional[int] = None,
+    ) -> Tuple[int, List[SearchMatch]]:
+        """Return the total hit count and the top *limit* matches for *query*.
+
+        ``sort="relevance"`` orders hits by BM25 score, ``sort="order"`` keeps
+        the statutory section order.
+        """
+        doc_range = self.act_ranges.get(act_id) if act_id else None
+        if act_id and doc_range is None:
+            return 0, []
+        clauses = parse_query(query, self.analyzer)
+        matches: Set[int] = set()
+        for clause in clauses:
+            matches.update(self._match_clause(clause, doc_range))
+        total = len(matches)
+
+        scoring_terms = self._scoring_terms(clauses)
+        if sort == SORT_ORDER:
+            selected = sorted(matches)[:limit] if limit is not None else sorted(matches)
+            return total, [SearchMatch(doc_id, 0.0, self._terms_in(doc_id, scoring_terms)) for doc_id in selected]
+
+        scored = ((self._score(doc_id, scoring_terms), doc_id) for doc_id in matches)
+        if limit is not None:
+            ranked = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+        else:
+            ranked = sorted(scored, key=lambda item: (-item[0], item[1]))
+        return total, [SearchMatch(doc_id, score, self._terms_in(doc_id, scoring_terms)) for score, doc_id in ranked]
+
+    def match_spans(self, doc_id: int, terms: Iterable[str]) -> Tuple[List[Span], List[Span]]:
+        """Character ranges of *terms* in a document's heading and body.
+
+        Computed from the positional postings and stored token offsets, so the
+        text itself is never re-tokenized.
+        """
+        heading_length = self.heading_lengths[doc_id]
+        offsets = self.token_offsets[doc_id]
+        heading_spans: List[Span] = []
+        body_spans: List[Span] = []
+        for term in terms:
+            for position in self.postings[term].get(doc_id, ()):
+                span = (offsets[2 * position], offsets[2 * position + 1])
+                (heading_spans if position < heading_length else body_spans).append(span)
+        return sorted(heading_spans), sorted(body_spans)
+
+    def _terms_in(self, doc_id: int, terms: List[str]) -> List[str]:
+        return [term for term in terms if doc_id in self.postings[term]]
+
+    def _scoring_terms(self, clauses: List[Clause]) -> List[str]:
+        terms: Dict[str, None] = {}
+        for clause in clauses:
+            terms.update(dict.fromkeys(clause.terms))
+            for phrase in clause.phrases:
+                terms.update(dict.fromkeys(phrase))
+            for prefix in clause.prefixes:
+                terms.update(dict.fromkeys(self._prefix_terms(prefix)))
+        return [term for term in terms if term in self.postings]
+
+    def _score(self, doc_id: int, terms: List[str]) -> float:
+        heading_length = self.heading_lengths[doc_id]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / (self.avg_doc_length or 1.0))
+        score = 0.0
+        for term in terms:
+            positions = self.postings[term].get(doc_id)
+            if positions is None:
+                continue
+            heading_tf = bisect_left(positions, heading_length)
+            tf = HEADING_BOOST * heading_tf + (len(positions) - heading_tf)
+            score += self.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+        return score
+
+    def _match_clause(self, clause: Clause, doc_range: Optional[Tuple[int, int]]) -> Iterable[int]:
+        required: List[Postings] = [self.postings.get(term, {}) for term in clause.terms]
+        for phrase in clause.phrases:
+            required.extend(self.postings.get(term, {}) for term in phrase)
+        prefix_sets = [self._expand_prefix(prefix) for prefix in clause.prefixes]
+
+        candidates: Optional[Iterable[int]] = None
+        if required:
+            smallest = min(required, key=len)
+            candidates = [doc for doc in smallest if all(doc in postings for postings in required)]
+        for docs in sorted(prefix_sets, key=len):
+            candidates = docs if candidates is None else [doc for doc in candidates if doc in docs]
+        if candidates is None:
+            return []
+
+        results = []
+        for doc_id in candidates:
+            if doc_range and not doc_range[0] <= doc_id < doc_range[1]:
+                continue
+            if all(self._has_phrase(doc_id, phrase) for phrase in clause.phrases):
+                results.append(doc_id)
+        return results
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        terms = self.sorted_terms
+        index = bisect_left(terms, prefix)
+        matched = []
+        while index < len(terms) and terms[index].startswith(prefix):
+            matched.append(terms[index])
+            index += 1
+        return matched
+
+    def _expand_prefix(self, prefix: str) -> Set[int]:
+        docs: Set[int] = set()
+        for term in self._prefix_terms(prefix):
+            docs.update(self.postings[term])
+        return docs
+
+    def _has_phrase(self, doc_id: int, phrase: List[str]) -> bool:
+        following = [set(self.postings[term][doc_id]) for term in phrase[1:]]
+        for start in self.postings[phrase[0]][doc_id]:
+            if all(start + offset in positions for offset, positions in enumerate(following, start=1)):
+                return True
+        return False
@@ -0,0 +1,47 @@
+"""Coalesce concurrent identical AI requests into one in-flight generation."""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """At most one running call per key; later callers await the same result.
+
+    A key is only tracked while its call is running, so once the result is
+    known (and cached by the caller) the next request starts afresh.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn()`` for *key*, or wait for the call already running."""
+        future = self._calls.get(key) or self.start(key, fn)
+        # Shielded so a caller that disconnects does not cancel the call the
+        # other waiters depend on.
+        return await asyncio.shield(future)
+
+    def join(self, key: str) -> Optional[asyncio.Future]:
+        """The running call for *key*, if there is one."""
+        return self._calls.get(key)
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> asyncio.Future:
+        """Run ``fn()`` for *key* as its own task and return it.
+
+        The task runs to completion even if the caller stops waiting for it.
+        """
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: asyncio.Future) -> None:
+        self._calls.pop(key, None)
+        # Mark the error as seen: every caller that is still waiting gets it,
+        # and one that gave up should not leave an "exception never
+        # retrieved" warning behind.
+        if not future.cancelled():
+            future.exception()
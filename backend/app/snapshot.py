@@ -0,0 +1,193 @@
+"""Versioned binary snapshot of the compiled act registry.
+
+Layout (all integers little-endian)::
+
+    header    magic, format version, source hash and the (offset, length)
+              of the three regions below
+    strings   UTF-8 headings and section texts, back to back
+    acts      pickled act metadata, including the offset table that
+              locates every section string inside the strings region
+    indexes   pickled search indexes, only unpickled on first use
+
+The file is opened with ``mmap`` so the strings region is read straight from
+the page cache and the index region is never touched unless a search runs.
+Because the mapping is read-only, every worker process opening the same file
+shares its pages.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import pickle
+import struct
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+SNAPSHOT_PATH = Path(__file__).parent.parent / "data" / "registry.snapshot"
+
+SNAPSHOT_MAGIC = b"ICVSNAP\x00"
+# Bump whenever the layout, the record fields or the analyzers change.
+SNAPSHOT_VERSION = 2
+
+HEADER = struct.Struct("<8sI32s6Q")
+MISSING = -1
+
+# (number, heading, text_en, text_hi)
+SectionRow = Tuple[str, str, str, Optional[str]]
+# (offset, length) of a string inside the strings region
+TextSpan = Tuple[int, int]
+# (number, heading, text_en span, text_hi span or None)
+SectionSpanRow = Tuple[str, str, TextSpan, Optional[TextSpan]]
+
+
+def compute_source_hash(paths: Iterable[Path], salt: str = "") -> bytes:
+    """Hash the names and contents of *paths* (plus *salt*) into 32 bytes."""
+    digest = hashlib.sha256(salt.encode("utf-8"))
+    for path in sorted(paths):
+        digest.update(path.name.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes())
+    return digest.digest()
+
+
+# ---------------------------------------------------------------------------
+
+
+def write_snapshot(
+    path: Path,
+    source_hash: bytes,
+    acts: Iterable[Tuple[str, str, List[str], Sequence[SectionRow]]],
+    indexes: Dict[str, Any],
+) -> None:
+    """Serialize acts (as ``(act_id, title, languages, rows)``) and indexes."""
+    strings = bytearray()
+    offsets = array("q")
+
+    def add_string(value: Optional[str]) -> None:
+        if value is None:
+            offsets.extend((MISSING, 0))
+            return
+        encoded = value.encode("utf-8")
+        offsets.extend((len(strings), len(encoded)))
+        strings.extend(encoded)
+
+    act_meta = []
+    for act_id, title, languages, rows in acts:
+        first_row = len(offsets) // 6
+        numbers = []
+        for number, heading, text_en, text_hi in rows:
+            numbers.append(number)
+            add_string(heading)
+            add_string(text_en)
+            add_string(text_hi)
+        act_meta.append(
+            {"act_id": act_id, "title": title, "languages": list(languages), "numbers": numbers, "first_row": first_row}
+        )
+
+    acts_blob = pickle.dumps({"acts": act_meta, "offsets": offsets.tobytes()}, protocol=pickle.HIGHEST_PROTOCOL)
+    indexes_blob = pickle.dumps(indexes, protocol=pickle.HIGHEST_PROTOCOL)
+
+    strings_offset = HEADER.size
+    acts_offset = strings_offset + len(strings)
+    indexes_offset = acts_offset + len(acts_blob)
+    header = HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        source_hash,
+        strings_offset,
+        len(strings),
+        acts_offset,
+        len(acts_blob),
+        indexes_offset,
+        len(indexes_blob),
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(header)
+        handle.write(strings)
+        handle.write(acts_blob)
+        handle.write(indexes_blob)
+    tmp_path.replace(path)
+
+
+class Snapshot:
+    """Read-only view over a snapshot file."""
+
+    def __init__(self, buffer: mmap.mmap, header: Tuple[Any, ...]) -> None:
+        self._buffer = buffer
+        (
+            _magic,
+            _version,
+            self.source_hash,
+            self._strings_offset,
+            _strings_length,
+            self._acts_offset,
+            self._acts_length,
+            self._indexes_offset,
+            self._indexes_length,
+        ) = header
+
+    @classmethod
+    def open(cls, path: Path, expected_hash: Optional[bytes] = None) -> Optional["Snapshot"]:
+        """Map *path*, or return ``None`` if it is missing, foreign or stale."""
+        if not path.exists():
+            return None
+        with path.open("rb") as handle:
+            try:
+                buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                return None
+        if len(buffer) < HEADER.size:
+            buffer.close()
+            return None
+        header = HEADER.unpack_from(buffer, 0)
+        magic, version, source_hash = header[:3]
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            buffer.close()
+            return None
+        if expected_hash is not None and source_hash != expected_hash:
+            buffer.close()
+            return None
+        return cls(buffer, header)
+
+    # ------------------------------------------------------------------
+    def iter_acts(self) -> Iterator[Tuple[str, str, List[str], List[SectionRow]]]:
+        for act_id, title, languages, span_rows in self.iter_act_spans():
+            rows: List[SectionRow] = [
+                (number, heading, self.read_text(en_span), self.read_text(hi_span) if hi_span else None)
+                for number, heading, en_span, hi_span in span_rows
+            ]
+            yield act_id, title, languages, rows
+
+    def iter_act_spans(self) -> Iterator[Tuple[str, str, List[str], List[SectionSpanRow]]]:
+        """Like :meth:`iter_acts` but leaves section texts in the mapped file."""
+        meta = pickle.loads(self._buffer[self._acts_offset : self._acts_offset + self._acts_length])
+        offsets = array("q")
+        offsets.frombytes(meta["offsets"])
+        for act in meta["acts"]:
+            rows: List[SectionSpanRow] = []
+            slot = act["first_row"] * 6
+            for number in act["numbers"]:
+                heading = self._read_string(offsets[slot], offsets[slot + 1]) or ""
+                en_span = (offsets[slot + 2], offsets[slot + 3])
+                hi_span = (offsets[slot + 4], offsets[slot + 5]) if offsets[slot + 4] != MISSING else None
+                rows.append((number, heading, en_span, hi_span))
+                slot += 6
+            yield act["act_id"], act["title"], act["languages"], rows
+
+    def read_text(self, span: TextSpan) -> str:
+        """Decode the string at *span*; the bytes come straight from the mapping."""
+        return self._read_string(*span) or ""
+
+    def load_indexes(self) -> Dict[str, Any]:
+        start = self._indexes_offset
+        return pickle.loads(self._buffer[start : start + self._indexes_length])
+
+    def _read_string(self, offset: int, length: int) -> Optional[str]:
+        if offset == MISSING:
+            return None
+        start = self._strings_offset + offset
+        with memoryview(self._buffer)[start : start + length] as view:
+            return str(view, "utf-8")
@@ -0,0 +1,108 @@
+"""
+Measure concurrent read throughput of the AI explanation cache.
+
+Fills a throwaway cache database with explanations and chat answers, then
+has N threads call get_explanation / get_chat_answer in a loop for a fixed
+time. The in-memory tier is disabled by default so the numbers reflect the
+storage backend (SQLite unless --backend says otherwise); pass --memory to
+include it. With --backend redis the entries go under a throwaway key
+prefix that is deleted when the run ends.
+
+Usage:
+    python benchmark_cache.py [--threads 1,4,16,32] [--seconds 3] [--entries 2000] [--memory]
+                              [--backend sqlite|memory|redis]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path to import the app package
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.cache_backends import RedisBackend, create_backend
+from app.cache_service import MEMORY_CACHE_SIZE, ExplanationCache
+
+
+def populate(cache: ExplanationCache, entries: int) -> None:
+    for i in range(entries):
+        cache.set_explanation(
+            f"Section {i}: whoever commits the offence shall be punished.",
+            "en",
+            True,
+            {"simple_explanation": f"Explanation {i} " * 20, "examples": f"Example {i} " * 10},
+        )
+        cache.set_chat_answer(f"What does section {i} say?", "en", f"Answer {i} " * 40)
+
+
+def run(cache: ExplanationCache, threads: int, seconds: float, entries: int) -> int:
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def worker(slot: int) -> None:
+        rng = random.Random(slot)
+        done = 0
+        while not stop.is_set():
+            i = rng.randrange(entries)
+            if done % 2:
+                cache.get_chat_answer(f"What does section {i} say?", "en")
+            else:
+                cache.get_explanation(f"Section {i}: whoever commits the offence shall be punished.", "en", True)
+            done += 1
+        counts[slot] = done
+
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", default="1,4,16,32", help="comma-separated thread counts")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each run")
+    parser.add_argument("--entries", type=int, default=2000, help="cached explanations and chat answers")
+    parser.add_argument("--memory", action="store_true", help="keep the in-memory tier enabled")
+    parser.add_argument("--backend", default="sqlite", help="sqlite, memory or redis (AI_CACHE_REDIS_URL)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "redis":
+            # Never mix synthetic entries into a live cache on the same server.
+            backend = RedisBackend(prefix=f"icv:bench:{uuid.uuid4().hex}")
+        else:
+            backend = create_backend(Path(tmp) / "bench.db", name=args.backend)
+        cache = ExplanationCache(memory_entries=MEMORY_CACHE_SIZE if args.memory else 0, backend=backend)
+        try:
+            bench(cache, args)
+        finally:
+            if isinstance(backend, RedisBackend):
+                backend.clear()
+            cache.close()
+
+
+def bench(cache: ExplanationCache, args: argparse.Namespace) -> None:
+    populate(cache, args.entries)
+    print(
+        f"📦 {args.entries} explanations + {args.entries} chat answers, "
+        f"{args.backend} backend, memory tier {'on' if args.memory else 'off'}"
+    )
+
+    for threads in (int(value) for value in args.threads.split(",")):
+        reads = run(cache, threads, args.seconds, args.entries)
+        print(f"⚡ {threads:>3} threads: {reads / args.seconds:>10,.0f} reads/s")
+
+    cache.flush_hits()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compile the structured act data into the binary registry snapshot.
+
+Run this after regenerating data/structured so API workers can start from
+the snapshot instead of parsing the JSON files. A stale snapshot (built from
+different source files, or by different loader/index code) is ignored at
+startup, so forgetting this step only costs startup time.
+
+Usage:
+    python build_snapshot.py [output_path]
+
+Output:
+    - backend/data/registry.snapshot (default)
+    - data/manifests/<corpus version>.json (commit this alongside the
+      regenerated data so clients on this version can later receive deltas)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import the app package
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.corpus_sync import CorpusSync
+from app.data_loader import REGISTRY, ActRegistry
+from app.snapshot import SNAPSHOT_PATH
+
+
+def main():
+    output = Path(sys.argv[1]) if len(sys.argv) > 1 else SNAPSHOT_PATH
+
+    start = time.perf_counter()
+    # Importing data_loader already built REGISTRY; only a registry read from
+    # the existing snapshot has to be rebuilt from the JSON files.
+    registry = ActRegistry(snapshot_path=None) if REGISTRY.loaded_from_snapshot else REGISTRY
+    registry.save_snapshot(output)
+    elapsed = time.perf_counter() - start
+
+    sections = sum(act.section_count for act in registry.list_acts())
+    print(f"✅ Compiled {len(registry.acts)} acts / {sections} sections in {elapsed:.2f}s")
+    print(f"📦 {output} ({output.stat().st_size / 1024:.0f} KB)")
+
+    manifest = CorpusSync(registry).publish()
+    if manifest:
+        print(f"🧾 Corpus manifest: {manifest}")
+
+
+if __name__ == "__main__":
+    main()
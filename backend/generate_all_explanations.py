@@ -26,45 +26,47 @@ import os
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.ai_service import legal_ai
+from app.cache_service import FALLBACK_EXPLANATIONS
+from app.data_loader import REGISTRY
 
 # Paths
-DATA_DIR = Path(__file__).parent / "data" / "structured"
 OUTPUT_DIR = Path(__file__).parent.parent / "mobile" / "assets" / "ai_explanations"
 
 # Create output directory
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Acts to process
-ACTS = {
-    "BNS-2023": "bns_en.json",
-    "BNSS-2023": "bnss_en.json", 
-    "BSA-2023": "bsa_en.json"
-}
+ACTS = ["BNS-2023", "BNSS-2023", "BSA-2023"]
 
-def load_sections(act_file: str) -> List[Dict]:
-    """Load sections from structured JSON file."""
-    file_path = DATA_DIR / act_file
-    
-    if not file_path.exists():
-        print(f"❌ File not found: {file_path}")
+def load_sections(act_id: str) -> List[Dict]:
+    """Load an act's sections as the API serves them.
+
+    Section numbers and texts must match the registry's so that
+    import_explanations.py can key each explanation on the same text a live
+    /api/explain request sends.
+    """
+    act = REGISTRY.get_act(act_id)
+    
+    if not act:
+        print(f"❌ Act not found: {act_id}")
         return []
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    sections = data.get('sections', [])
-    print(f"✅ Loaded {len(sections)} sections from {act_file}")
+    sections = [
+        {"number": record.number, "heading": record.heading, "text_en": record.text_en}
+        for record in act.iter_sections()
+    ]
+    print(f"✅ Loaded {len(sections)} sections of {act_id}")
     return sections
 
 
-def generate_explanations_for_act(act_id: str, act_file: str, language: str = "en"):
+def generate_explanations_for_act(act_id: str, language: str = "en"):
     """Generate AI explanations for all sections of an act."""
     
     print(f"\n{'='*60}")
     print(f"📝 Generating {language.upper()} explanations for {act_id}")
     print(f"{'='*60}\n")
     
-    sections = load_sections(act_file)
+    sections = load_sections(act_id)
     
     if not sections:
         print(f"⚠️  No sections found for {act_id}")
@@ -93,6 +95,10 @@ def generate_explanations_for_act(act_id: str, act_file: str, language: str = "e
                 language=language,
                 include_examples=True
             )
+            # explain_section answers with fallback text instead of raising
+            # when Gemini fails; record it as an error so it is never imported.
+            if result.get('simple_explanation') in FALLBACK_EXPLANATIONS.values():
+                raise RuntimeError(result['simple_explanation'])
             
             explanations[section_num] = {
                 "section_number": section_num,
@@ -150,15 +156,15 @@ def main():
     start_time = time.time()
     
     # Generate for each act and language
-    for act_id, act_file in ACTS.items():
+    for act_id in ACTS:
         # English explanations
-        generate_explanations_for_act(act_id, act_file, language="en")
+        generate_explanations_for_act(act_id, language="en")
         
         print("\n⏳ Waiting 10 seconds before next act...")
         time.sleep(10)
         
         # Hindi explanations
-        generate_explanations_for_act(act_id, act_file, language="hi")
+        generate_explanations_for_act(act_id, language="hi")
         
         print("\n⏳ Waiting 10 seconds before next act...")
         time.sleep(10)
@@ -174,6 +180,7 @@ def main():
     print("2. Update Flutter app to load from assets instead of API")
     print("3. Remove AI explanation API calls from mobile app")
     print("4. Build new app version with bundled explanations")
+    print("5. Restart the server (or run import_explanations.py) to load them into its AI cache")
 
 
 if __name__ == "__main__":
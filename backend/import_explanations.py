@@ -0,0 +1,48 @@
+"""
+Load pre-generated AI explanations into the live explanation cache.
+
+Reads the bundles generate_all_explanations.py writes and stores every entry
+in the configured cache backend in one transaction, keyed on the section
+text exactly as a live /api/explain request for that section would be.
+Sections already cached are left alone unless --replace is given (e.g. after
+regenerating the bundles). The server also imports missing sections on
+startup unless AI_CACHE_IMPORT_BUNDLES=0.
+
+Usage:
+    python import_explanations.py [--dir ../mobile/assets/ai_explanations] [--replace]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import the app package
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.cache_service import explanation_cache
+from app.data_loader import REGISTRY
+from app.explanation_bundles import BUNDLE_DIR, BUNDLE_PATTERN, import_bundles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=BUNDLE_DIR, help="directory holding the bundles")
+    parser.add_argument("--replace", action="store_true", help="overwrite sections that are already cached")
+    args = parser.parse_args()
+
+    bundles = sorted(args.dir.glob(BUNDLE_PATTERN)) if args.dir.is_dir() else []
+    if not bundles:
+        print(f"❌ No {BUNDLE_PATTERN} bundles in {args.dir}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    imported = import_bundles(explanation_cache, REGISTRY, args.dir, replace=args.replace)
+    elapsed = time.perf_counter() - start
+    print(f"📦 {len(bundles)} bundles, {imported} explanations imported in {elapsed:.2f}s")
+    print(f"📊 {explanation_cache.get_stats()}")
+    explanation_cache.close()
+
+
+if __name__ == "__main__":
+    main()